@@ -0,0 +1,87 @@
+"""
+Latency of the GeoGuessr API calls with a new aiohttp session per call (the former behaviour)
+and with the shared `geoguessr_api.GeoGuessrClient`.
+
+    python benchmarks/geoguessr_http_benchmark.py --calls 200
+    python benchmarks/geoguessr_http_benchmark.py --calls 20 --url https://www.geoguessr.com
+
+By default the calls go to a local stub server, which only measures the connection setup of a
+plain HTTP connection: against geoguessr.com the DNS lookup and the TLS handshake saved by the
+shared session are much more expensive.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import geoguessr_api as gg  # noqa: E402
+
+PLAYER_ID = "5b51062a4010740f7cd91dd5"
+
+
+async def start_stub_server() -> tuple[web.AppRunner, str]:
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({"gamesPlayed": 42})
+
+    async def progress(request: web.Request) -> web.Response:
+        return web.json_response({"divisionNumber": 2, "rating": 1234})
+
+    app = web.Application()
+    app.router.add_get("/api/v3/users/{geoguessrId}/stats", stats)
+    app.router.add_get("/api/v4/ranked-system/progress/{geoguessrId}", progress)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def call_with_new_session(baseUrl: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{baseUrl}/api/v3/users/{PLAYER_ID}/stats") as response:
+            await response.read()
+
+
+async def measure(name: str, call, calls: int) -> float:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+    median = statistics.median(latencies)
+    print(f"{name:<16} p50 {median * 1000:>8.2f} ms  max {max(latencies) * 1000:>8.2f} ms")
+    return median
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--url", help="API root to call instead of the local stub server")
+    args = parser.parse_args()
+
+    runner = None
+    baseUrl = args.url
+    if baseUrl is None:
+        runner, baseUrl = await start_stub_server()
+    client = gg.GeoGuessrClient(baseUrl=baseUrl)
+    try:
+        newSession = await measure("new session", lambda: call_with_new_session(baseUrl), args.calls)
+        shared = await measure("shared client", lambda: client.is_ok(f"/api/v3/users/{PLAYER_ID}/stats"), args.calls)
+        print(f"saved per call   {(newSession - shared) * 1000:>8.2f} ms ({newSession / shared:.1f}x)")
+    finally:
+        await client.close()
+        if runner is not None:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark of the role membership checks, with up to 50 000 cached members.
+
+    python benchmarks/role_check_benchmark.py --members 1000 10000 50000
+
+Compares `member in role.members` (what `/team` used to do) with `roles.has_role`. The guild, role
+and member classes below reproduce how discord.py implements `Role.members` and `Member.get_role`.
+"""
+
+import argparse
+import bisect
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import roles as rl  # noqa: E402
+
+ROLE_IDS = list(range(1000, 1040))
+
+
+class FakeGuild:
+    def __init__(self):
+        self._members: dict[int, "FakeMember"] = {}
+        self._roles: dict[int, "FakeRole"] = {}
+
+    def get_role(self, roleId: int):
+        return self._roles.get(roleId)
+
+
+class FakeRole:
+    def __init__(self, guild: FakeGuild, roleId: int):
+        self.guild = guild
+        self.id = roleId
+
+    @property
+    def members(self) -> list:
+        # Comme discord.py : parcourt tous les membres en cache du serveur
+        return [member for member in self.guild._members.values() if member.has_role_id(self.id)]
+
+
+class FakeMember:
+    def __init__(self, guild: FakeGuild, memberId: int, roleIds: list[int]):
+        self.guild = guild
+        self.id = memberId
+        # discord.utils.SnowflakeList : liste triée, recherche dichotomique
+        self._roles = sorted(roleIds)
+
+    def has_role_id(self, roleId: int) -> bool:
+        index = bisect.bisect_left(self._roles, roleId)
+        return index != len(self._roles) and self._roles[index] == roleId
+
+    def get_role(self, roleId: int):
+        return self.guild.get_role(roleId) if self.has_role_id(roleId) else None
+
+
+def build_guild(memberCount: int) -> FakeGuild:
+    guild = FakeGuild()
+    for roleId in ROLE_IDS:
+        guild._roles[roleId] = FakeRole(guild, roleId)
+    for memberId in range(memberCount):
+        guild._members[memberId] = FakeMember(guild, memberId, random.sample(ROLE_IDS, random.randint(0, 5)))
+    return guild
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--checks", type=int, default=200, help="checks per measure")
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'members':>8}  {'role.members':>14}  {'has_role':>10}")
+    for memberCount in args.members:
+        guild = build_guild(memberCount)
+        role = guild.get_role(ROLE_IDS[0])
+        member = guild._members[memberCount - 1]
+        scanTime = min(timeit.repeat(lambda: member in role.members, number=args.checks, repeat=3)) / args.checks
+        helperTime = min(timeit.repeat(lambda: rl.has_role(member, role.id), number=args.checks, repeat=3)) / args.checks
+        print(f"{memberCount:>8}  {scanTime * 1e6:>11.1f} µs  {helperTime * 1e6:>7.3f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load test of the registration, team and bet flows against a local storage backend.
+
+    python benchmarks/storage_load_test.py --backend memory --players 5000 --latency-ms 80
+    python benchmarks/storage_load_test.py --backend sqlite --players 5000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import storage as st  # noqa: E402
+
+
+async def timed(latencies: list[float], coroutine):
+    start = time.perf_counter()
+    await coroutine
+    latencies.append(time.perf_counter() - start)
+
+
+def report(name: str, latencies: list[float], elapsed: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<14} {len(latencies):>7} ops  {len(latencies) / elapsed:>10.0f} ops/s  "
+        f"p50 {statistics.median(latencies) * 1000:>7.2f} ms  p95 {p95 * 1000:>7.2f} ms"
+    )
+
+
+async def run_phase(name: str, coroutines: list, concurrency: int):
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(coroutine):
+        async with semaphore:
+            await timed(latencies, coroutine)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(coroutine) for coroutine in coroutines))
+    report(name, latencies, time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace):
+    qualifiedTeams = [f"Team{index}_Mate{index}" for index in range(16)]
+    if args.backend == "memory":
+        backend = st.MemoryStorage(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, qualifiedTeams=qualifiedTeams)
+    else:
+        backend = st.SQLiteStorage(os.path.join(tempfile.mkdtemp(), "load_test.sqlite3"))
+        with backend.connection:
+            backend.connection.executemany("INSERT INTO qualified_teams VALUES (?)", [(team,) for team in qualifiedTeams])
+
+    members = [SimpleNamespace(id=100000 + index, name=f"player{index}") for index in range(args.players)]
+
+    await run_phase(
+        "registration",
+        [
+            backend.add_registration({"discordId": str(member.id), "geoguessrId": f"{member.id:024x}", "surname": member.name})
+            for member in members
+        ],
+        args.concurrency,
+    )
+    await run_phase(
+        "team",
+        [
+            backend.create_team(members[index], members[index + 1], "Move", "No move", "NMPZ")
+            for index in range(0, len(members) - 1, 2)
+        ],
+        args.concurrency,
+    )
+
+    async def bet(member):
+        if not await backend.has_bet(member.id):
+            teams = await backend.get_qualified_teams_names()
+            await backend.place_bet(member.id, teams[0], teams[1], teams[2], False, member.name)
+
+    await run_phase("bet", [bet(member) for member in members], args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected latency (memory backend)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="injected jitter (memory backend)")
+    asyncio.run(main(parser.parse_args()))
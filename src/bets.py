@@ -0,0 +1,131 @@
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import discord
+
+PODIUM_QUESTIONS = (
+    "Which team will win this Hellcup ?",
+    "Which team will finish 2nd of this Hellcup ?",
+    "Which team will finish 3rd of this Hellcup ?",
+)
+RANK_LABELS = ("1st", "2nd", "3rd")
+
+
+@dataclass
+class BetSession:
+    """The state of a /bet flow: the teams in their shuffled order and the picks so far."""
+
+    token: str
+    userId: int
+    teams: list[str]
+    picks: list[str] = field(default_factory=list)
+    expiresAt: float = 0.0
+
+
+@dataclass
+class BetChoice:
+    """A click on a team button ("bet.<token>.<team index>")."""
+
+    token: str
+    teamIndex: int
+
+
+@dataclass
+class BetName:
+    """A click on a display name button ("anonymous.<token>.<yes|no>")."""
+
+    token: str
+    anonymous: bool
+
+
+def parse_bet_choice(data: str) -> BetChoice:
+    token, teamIndex = data.split(".")
+    return BetChoice(token, int(teamIndex))
+
+
+def parse_bet_name(data: str) -> BetName:
+    token, anonymous = data.split(".")
+    if anonymous not in ("yes", "no"):
+        raise ValueError(f"custom_id de pari invalide : {data}")
+    return BetName(token, anonymous == "yes")
+
+
+class BetSessionStore:
+    """
+    Keeps the /bet flows in progress, keyed by a short random token.
+
+    Only the token and the index of the team are put in the custom_ids, so the team names can
+    contain dots and be as long as Discord allows in a button label.
+    """
+
+    def __init__(self, ttl: float = 900):
+        """
+        Args:
+            ttl (float, optional): Seconds a session stays valid after its last click. Defaults to 900.
+        """
+        self.ttl = ttl
+        self.sessions: dict[str, BetSession] = {}
+
+    def create(self, userId: int, teams: list[str]) -> BetSession:
+        self._purge()
+        token = secrets.token_urlsafe(6)
+        while token in self.sessions:
+            token = secrets.token_urlsafe(6)
+        session = BetSession(token, userId, list(teams), expiresAt=time.monotonic() + self.ttl)
+        self.sessions[token] = session
+        return session
+
+    def get(self, token: str, userId: int) -> Optional[BetSession]:
+        """Returns the session if it exists, has not expired and belongs to this user."""
+        session = self.sessions.get(token)
+        if session is None or session.userId != userId:
+            return None
+        if session.expiresAt < time.monotonic():
+            del self.sessions[token]
+            return None
+        session.expiresAt = time.monotonic() + self.ttl
+        return session
+
+    def close(self, token: str):
+        self.sessions.pop(token, None)
+
+    def _purge(self):
+        now = time.monotonic()
+        for token in [token for token, session in self.sessions.items() if session.expiresAt < now]:
+            del self.sessions[token]
+
+
+def render_picks(session: BetSession) -> tuple[str, discord.ui.View]:
+    """Builds the question and the team buttons of the next podium pick."""
+    view = discord.ui.View()
+    for teamIndex, team in enumerate(session.teams):
+        if team in session.picks:
+            rank = session.picks.index(team)
+            view.add_item(
+                discord.ui.Button(label=f"{team} ({RANK_LABELS[rank]})", style=discord.ButtonStyle.green, disabled=True)
+            )
+        else:
+            view.add_item(
+                discord.ui.Button(
+                    label=team, custom_id=f"bet.{session.token}.{teamIndex}", style=discord.ButtonStyle.primary
+                )
+            )
+    return PODIUM_QUESTIONS[len(session.picks)], view
+
+
+def render_name_choice(session: BetSession, displayName: str) -> tuple[str, discord.ui.View]:
+    """Builds the recap of the picks and the buttons to choose the displayed name."""
+    bet1, bet2, bet3 = session.picks
+    betsMessage = f"Here's the recap of your bets !\n\n- :first_place: : {bet1}\n- :second_place: : {bet2}\n- :third_place: : {bet3}\n\nUnder what name do you want the bet to be displayed ?\n"
+    view = discord.ui.View()
+    view.add_item(
+        discord.ui.Button(
+            label=displayName, custom_id=f"anonymous.{session.token}.no", style=discord.ButtonStyle.primary
+        )
+    )
+    view.add_item(
+        discord.ui.Button(label="Anonymous", custom_id=f"anonymous.{session.token}.yes", style=discord.ButtonStyle.primary)
+    )
+    return betsMessage, view
@@ -1,33 +1,99 @@
+import asyncio
+import io
 import os
 from random import shuffle
 import traceback
-from datetime import datetime
+from datetime import datetime, timezone
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-from easyDB import DB
 from googletrans import Translator
 
+import bets as bt
+import cache_profile as cp
 import discord_logs as dl
+import elo_refresh as er
+import gspread_utilities as gu
 import hellcup as hc
+import interaction_router as ir
+import invite_tracker as it
 import layoutViews as lv
+import message_store as ms
 import modals as md
+import presence as pr
+import roles as rl
+import sheet_sync as ssy
+import storage as st
+import temp_voice as tv
+from config import config
 
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
+# Stockage des données du tournoi : "sqlite" (défaut, synchronisé avec le Google Sheet), "gsheet" ou "memory" (tests de charge)
+hc.storage = st.create_storage(os.getenv("HELLBOT_STORAGE", "sqlite"))
+
+
+class HellBot(commands.Bot):
+    async def setup_hook(self):
+        """
+        Importe le Google Sheet dans la base SQLite avant la connexion à Discord, pour que /bet et les
+        inscriptions ne lisent pas des tables encore vides au démarrage.
+        """
+        if sheetSync is None:
+            return
+        try:
+            await sheetSync.import_once()
+        except Exception as e:
+            traceback.print_exc()
+            await log.send_log_embed("Impossible d'importer le Google Sheet au démarrage", dl.LogLevels.ERROR, e)
+
+    async def close(self):
+        """Enregistre l'état en attente et ferme les connexions HTTP avant de fermer la connexion à Discord."""
+        tempVoices.flush()
+        hc.playerProfiles.flush()
+        await log.close()
+        await hc.geoguessr.close()
+        await super().close()
 
-# Créer une instance du bot avec le préfixe '!'
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="/", intents=intents)
 
+# Créer une instance du bot avec le préfixe '!'
+# Intents et caches : "default", "lean" (gros serveur, moins de mémoire) ou "full" (tout, comme avant)
+bot = HellBot(command_prefix="/", **cp.client_options(os.getenv("HELLBOT_CACHE_PROFILE", "default")))
+
+
+log = dl.DiscordLog(config.logsChannelId)
+# Boutons custom (inscription, paris), identifiés par le préfixe de leur custom_id
+router = ir.CustomIdRouter(bot, log)
+# Paris en cours (/bet), les custom_id des boutons ne contiennent que le jeton de la session
+betSessions = bt.BetSessionStore()
+# Nombre d'utilisations des invitations, pour savoir qui a invité les nouveaux membres
+inviteTracker = it.InviteTracker()
+# Salons vocaux temporaires
+tempVoices = tv.TempVoiceManager(config)
+# Nombre de membres affiché dans le statut du bot
+memberCountPresence = pr.MemberCountPresence(bot, config.hellcupGuildId)
+# Contenu des messages récents, pour les logs de suppression et de modification (budget mémoire en Mo)
+messageStore = ms.MessageContentStore(maxBytes=int(os.getenv("HELLBOT_MESSAGE_STORE_MB", "64")) * 1024 * 1024)
+# Synchronisation de la base SQLite avec le Google Sheet (uniquement avec le stockage SQLite)
+sheetSync = ssy.SheetSyncWorker(hc.storage) if isinstance(hc.storage, st.SQLiteStorage) else None
+# Rafraîchissement des ELO de tous les inscrits (toutes les 6 heures et avec $refresh_elo)
+eloRefresh = er.EloRefreshJob(hc.geoguessr, hc.storage)
+# Tâches de fond lancées une seule fois par process
+backgroundTasks: dict[str, asyncio.Task] = {}
+
+
+async def report_sheet_write_failure(worksheetName: str, count: int, error: Exception):
+    """Signale dans le canal des logs les écritures du journal qui n'ont pas pu être envoyées au Google Sheet."""
+    await log.send_log_embed(
+        f"{count} écriture(s) dans la feuille {worksheetName} en échec, rejouée(s) au prochain démarrage",
+        dl.LogLevels.ERROR,
+        repr(error),
+    )
 
-database = DB("hellbot")
 
-log = dl.DiscordLog(database.get("logs_channel_id"))
-# Variable globale pour stocker les invitations
-invitesBefore = {}
+gu.writeQueue.onFailure = report_sheet_write_failure
 
 
 @bot.event
@@ -38,28 +104,46 @@ async def on_ready():
     Cet événement est appelé lorsque le bot est prêt à recevoir des commandes et des événements.
     Il s'agit d'un événement asynchrone qui est appelé automatiquement par Discord.
 
-    Lorsque cet événement est appelé, le bot charge les invitations existantes pour chaque serveur,
-    puis change son statut pour afficher le nombre de membres du serveur HellCup.
+    Lorsque cet événement est appelé, le bot affiche le nombre de membres du serveur HellCup
+    dans son statut (mis à jour au plus une fois toutes les 30 secondes), puis lance le chargement
+    des invitations existantes en arrière-plan (de nouveau après une reconnexion sans reprise de session).
+    La taille des caches (membres, messages...) est ensuite affichée dans la console.
     """
     print(f"{bot.user} est connecté à Discord!")
-    guild = bot.get_guild(database.get("hellcup_guild_id"))
+    guild = bot.get_guild(config.hellcupGuildId)
     log.add_guild(guild)
-    # Charger les invitations existantes pour chaque serveur
-    for guild in bot.guilds:
-        invitesBefore[guild.id] = await guild.invites()
-        invitesBefore[guild.id] = {inv.code: inv for inv in invitesBefore[guild.id]}
-
-    await bot.change_presence(
-        activity=discord.Activity(
-            name=f"{len(guild.members)} (really) cool members !",
-            type=discord.ActivityType.competing,
-        )
-    )
+    if guild is not None:
+        memberCountPresence.set_count(guild.member_count or len(guild.members))
+    # Charger les invitations existantes en arrière-plan (une seule fois par processus). Un nouvel
+    # on_ready signifie une nouvelle session : les événements d'invitation manqués imposent de les recharger
+    if "invites_warm_up" in backgroundTasks and backgroundTasks["invites_warm_up"].done():
+        inviteTracker.mark_stale()
+    if "invites_warm_up" not in backgroundTasks or backgroundTasks["invites_warm_up"].done():
+        backgroundTasks["invites_warm_up"] = asyncio.create_task(inviteTracker.warm_up(bot.guilds))
+    # Supprimer les salons vocaux temporaires restés vides (redémarrage, crash)
+    if guild is not None:
+        await tempVoices.reconcile(guild)
+    # Ouvrir une fois le client Google Sheets partagé
+    try:
+        await gu.warm_up()
+    except Exception as e:
+        await log.send_log_embed("Impossible d'ouvrir le Google Sheet au démarrage", dl.LogLevels.WARNING, e)
+    if "config_watch" not in backgroundTasks:
+        backgroundTasks["config_watch"] = asyncio.create_task(config.watch())
+    if sheetSync is not None:
+        if "sheet_sync" not in backgroundTasks:
+            backgroundTasks["sheet_sync"] = asyncio.create_task(sheetSync.run())
+    elif "inscrits_mirror" not in backgroundTasks:
+        backgroundTasks["inscrits_mirror"] = asyncio.create_task(gu.inscrits_mirror_refresh_loop())
+    if "elo_refresh" not in backgroundTasks:
+        backgroundTasks["elo_refresh"] = asyncio.create_task(eloRefresh.run_periodically(log=log))
+    report = cp.format_cache_report(cp.cache_report(bot, messageStore))
+    print(f"Caches ({os.getenv('HELLBOT_CACHE_PROFILE', 'default')}) :\n{report}")
 
 
 async def log_error(error: Exception, ctx=None):
     """Envoie les erreurs dans le canal des super logs"""
-    logsChannelId = database.get("logs_channel_id")
+    logsChannelId = config.logsChannelId
     if not logsChannelId:
         return  # Si pas de canal configuré, on ne fait rien
 
@@ -116,195 +200,282 @@ async def on_invite_create(invite: discord.Invite):
     Envoie un message dans le canal des logs avec les informations sur l'invitation.
     Met à jour la liste des invitations du serveur.
     """
-    logsChannelId = database.get("logs_channel_id")
+    logsChannelId = config.logsChannelId
     if not logsChannelId:
         return
 
-    logsChannel = bot.get_channel(logsChannelId)
-    if logsChannel:
-        embed = discord.Embed(title="Nouvelle Invitation Créée", color=discord.Color.blue(), timestamp=datetime.now())
-        embed.add_field(name="Créée par", value=invite.inviter.mention, inline=True)
-        embed.add_field(name="Code", value=invite.code, inline=True)
-        embed.add_field(name="Channel", value=invite.channel.mention, inline=True)
-        if invite.max_uses:
-            embed.add_field(name="Utilisations max", value=invite.max_uses, inline=True)
-        if invite.expires_at:
-            embed.add_field(name="Expire le", value=invite.expires_at.strftime("%d/%m/%Y à %H:%M"), inline=True)
-        embed.set_footer(text=f"ID: {invite.inviter.id}")
-        await logsChannel.send(embed=embed)
-    invitesBefore[invite.guild.id] = await invite.guild.invites()
-    invitesBefore[invite.guild.id] = {inv.code: inv for inv in invitesBefore[invite.guild.id]}
+    embed = discord.Embed(title="Nouvelle Invitation Créée", color=discord.Color.blue(), timestamp=datetime.now())
+    embed.add_field(name="Créée par", value=invite.inviter.mention, inline=True)
+    embed.add_field(name="Code", value=invite.code, inline=True)
+    embed.add_field(name="Channel", value=invite.channel.mention, inline=True)
+    if invite.max_uses:
+        embed.add_field(name="Utilisations max", value=invite.max_uses, inline=True)
+    if invite.expires_at:
+        embed.add_field(name="Expire le", value=invite.expires_at.strftime("%d/%m/%Y à %H:%M"), inline=True)
+    embed.set_footer(text=f"ID: {invite.inviter.id}")
+    log.enqueue(embed, "invite")
+    inviteTracker.on_invite_create(invite)
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    """
+    Événement appelé lorsque le bot rejoint un serveur.
+    Charge les invitations du serveur pour retrouver qui a invité les prochains membres.
+    """
+    inviteTracker.mark_stale(guild.id)
+    await inviteTracker.warm_up([guild])
+
+
+@bot.event
+async def on_invite_delete(invite: discord.Invite):
+    """
+    Événement appelé lorsqu'une invitation est supprimée (à la main, expirée ou utilisée le nombre max de fois).
+    Met à jour la liste des invitations du serveur.
+    """
+    inviteTracker.on_invite_delete(invite)
 
 
 @bot.event
-async def on_message_delete(message: discord.Message):
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
     """
-    Événement appelé lorsque le bot détecte la suppression d'un message.
+    Événement appelé lorsque le bot détecte la suppression d'un message, même absent du cache de discord.py.
 
-    Envoie un message dans le canal des logs avec les informations sur le message supprimé.
+    Envoie un message dans le canal des logs avec les informations sur le message supprimé, retrouvées
+    dans le cache de discord.py ou dans le stockage compact des messages.
 
     Si le canal des logs n'est pas configuré, cet événement ne fait rien.
 
-    Si le message a été envoyé par un bot, cet événement ne fait rien.
+    Si le message a été envoyé par un bot ou n'est pas connu du bot, cet événement ne fait rien.
     """
-    logsChannelId = database.get("logs_channel_id")
+    record = messageStore.pop(payload.message_id)
+    logsChannelId = config.logsChannelId
     if not logsChannelId:
         return
 
-    # Ignorer les messages des bots
-    if message.author.bot:
+    message = payload.cached_message
+    if message is not None:
+        # Ignorer les messages des bots
+        if message.author.bot:
+            return
+        authorMention, authorId, content = message.author.mention, message.author.id, message.content
+    elif record is not None:
+        authorMention, authorId, content = f"<@{record.authorId}>", record.authorId, record.content
+    else:
         return
 
-    logsChannel = bot.get_channel(logsChannelId)
-    if logsChannel:
-        embed = discord.Embed(
-            title="Message Supprimé",
-            description=f"Un message a été supprimé dans {message.channel.mention}",
-            color=discord.Color.red(),
-            timestamp=datetime.now(),
-        )
-        embed.add_field(name="Auteur", value=message.author.mention, inline=False)
-        embed.add_field(name="Contenu", value=message.content or "Contenu non disponible", inline=False)
-        embed.set_footer(text=f"ID: {message.author.id}")
-        await logsChannel.send(embed=embed)
+    embed = discord.Embed(
+        title="Message Supprimé",
+        description=f"Un message a été supprimé dans <#{payload.channel_id}>",
+        color=discord.Color.red(),
+        timestamp=datetime.now(),
+    )
+    embed.add_field(name="Auteur", value=authorMention, inline=False)
+    embed.add_field(name="Contenu", value=content or "Contenu non disponible", inline=False)
+    embed.set_footer(text=f"ID: {authorId}")
+    log.enqueue(embed, "deletion")
 
 
 @bot.event
-async def on_message_edit(before: discord.Message, after: discord.Message):
-    """Événement appelé lorsque le bot détecte la modification d'un message.
+async def on_raw_bulk_message_delete(payload: discord.RawBulkMessageDeleteEvent):
+    """
+    Événement appelé lorsque plusieurs messages sont supprimés d'un coup (purge, nettoyage après un raid).
 
-    Envoie un message dans le canal des logs avec les informations sur le message modifié.
+    Envoie un seul embed de résumé dans le canal des logs, avec en pièce jointe le contenu des messages
+    connus du bot (cache de discord.py ou stockage compact des messages). Les messages inconnus sont
+    listés avec leur seul ID.
+    """
+    records = {messageId: messageStore.pop(messageId) for messageId in payload.message_ids}
+    logsChannelId = config.logsChannelId
+    if not logsChannelId:
+        return
+
+    channel = bot.get_channel(payload.channel_id)
+    cachedMessages = {message.id: message for message in payload.cached_messages}
+    lines = []
+    knownMessagesCount = 0
+    botMessagesCount = 0
+    for messageId in sorted(payload.message_ids):
+        message = cachedMessages.get(messageId)
+        record = records[messageId]
+        if message is not None and message.author.bot:
+            botMessagesCount += 1
+        elif message is not None:
+            knownMessagesCount += 1
+            lines.append(
+                f"[{message.created_at.strftime('%d/%m/%Y %H:%M:%S')}] {message.author} ({message.author.id}) : {message.content}"
+            )
+        elif record is not None:
+            knownMessagesCount += 1
+            lines.append(
+                f"[{datetime.fromtimestamp(record.createdAt, timezone.utc).strftime('%d/%m/%Y %H:%M:%S')}] {record.authorName} ({record.authorId}) : {record.content}"
+            )
+        else:
+            lines.append(f"[{discord.utils.snowflake_time(messageId).strftime('%d/%m/%Y %H:%M:%S')}] {messageId} : contenu non disponible")
+
+    embed = discord.Embed(
+        title="Suppression Groupée",
+        description=f"{len(payload.message_ids)} messages ont été supprimés dans {channel.mention if channel else payload.channel_id}",
+        color=discord.Color.red(),
+        timestamp=datetime.now(),
+    )
+    embed.add_field(name="Contenu connu", value=f"{knownMessagesCount} message(s)", inline=True)
+    embed.add_field(
+        name="Hors cache", value=f"{len(payload.message_ids) - knownMessagesCount - botMessagesCount} message(s)", inline=True
+    )
+    if botMessagesCount:
+        embed.add_field(name="Messages de bots ignorés", value=str(botMessagesCount), inline=True)
+    file = discord.File(
+        io.BytesIO("\n".join(lines).encode("utf-8")),
+        filename=f"suppression-{payload.channel_id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt",
+    )
+    log.enqueue(embed, "deletion", file)
+
+
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent):
+    """Événement appelé lorsque le bot détecte la modification d'un message, même absent du cache de discord.py.
+
+    Envoie un message dans le canal des logs avec les informations sur le message modifié, l'ancien
+    contenu étant retrouvé dans le cache de discord.py ou dans le stockage compact des messages.
 
     Si le canal des logs n'est pas configuré, cet événement ne fait rien.
 
-    Si le message a été envoyé par un bot, cet événement ne fait rien.
+    Si le message a été envoyé par un bot ou n'est pas connu du bot, cet événement ne fait rien.
 
     Si le contenu n'a pas changé (par exemple, uniquement un embed ajouté), cet événement ne fait rien.
 
     """
+    # Pas de contenu dans l'événement : uniquement un embed ajouté ou un message épinglé
+    if "content" not in payload.data:
+        return
+    afterContent = payload.data["content"]
+    previousContent = messageStore.update_content(payload.message_id, afterContent)
 
-    logsChannelId = database.get("logs_channel_id")
+    logsChannelId = config.logsChannelId
     if not logsChannelId:
         return
 
     # Ignorer les messages des bots
-    if before.author.bot:
+    if payload.data.get("author", {}).get("bot"):
         return
 
-    # Ignorer si le contenu n'a pas changé (par exemple, uniquement un embed ajouté)
-    if before.content == after.content:
+    if payload.cached_message is not None:
+        beforeContent = payload.cached_message.content
+    elif previousContent is not None:
+        beforeContent = previousContent
+    else:
         return
 
-    logsChannel = bot.get_channel(logsChannelId)
-    if logsChannel:
-        embed = discord.Embed(
-            title="Message Modifié",
-            description=f"Un message a été modifié dans {before.channel.mention}",
-            color=discord.Color.blue(),
-            timestamp=datetime.now(),
-        )
-        embed.add_field(name="Auteur", value=before.author.mention, inline=False)
-        embed.add_field(name="Avant", value=before.content or "Contenu non disponible", inline=False)
-        embed.add_field(name="Après", value=after.content or "Contenu non disponible", inline=False)
-        embed.add_field(name="Lien", value=f"[Aller au message]({after.jump_url})", inline=False)
-        embed.set_footer(text=f"ID: {before.author.id}")
-        await logsChannel.send(embed=embed)
+    # Ignorer si le contenu n'a pas changé
+    if beforeContent == afterContent:
+        return
+
+    authorId = int(payload.data["author"]["id"]) if "author" in payload.data else 0
+    jumpUrl = f"https://discord.com/channels/{payload.guild_id or '@me'}/{payload.channel_id}/{payload.message_id}"
+    embed = discord.Embed(
+        title="Message Modifié",
+        description=f"Un message a été modifié dans <#{payload.channel_id}>",
+        color=discord.Color.blue(),
+        timestamp=datetime.now(),
+    )
+    embed.add_field(name="Auteur", value=f"<@{authorId}>", inline=False)
+    embed.add_field(name="Avant", value=beforeContent or "Contenu non disponible", inline=False)
+    embed.add_field(name="Après", value=afterContent or "Contenu non disponible", inline=False)
+    embed.add_field(name="Lien", value=f"[Aller au message]({jumpUrl})", inline=False)
+    embed.set_footer(text=f"ID: {authorId}")
+    log.enqueue(embed, "edit")
 
 
 @bot.event
 async def on_member_join(member: discord.Member):
     """Événement appelé lorsque le bot détecte l'arrivée d'un nouveau membre.
 
+    Met à jour le nombre de membres affiché dans le statut du bot.
     Ajoute le rôle de newbie au membre.
-    Récupère les invitations du serveur.
-    Met à jour la liste des invitations.
+    Retrouve l'invitation utilisée grâce au suivi des invitations (ou les invitations possibles si plusieurs
+    membres sont arrivés en même temps avec des invitations différentes).
     Crée un message de bienvenue avec les informations sur l'invitation si trouvée.
     Envoie le message de bienvenue dans le canal des logs.
-    Si le canal des logs n'est pas configuré, cet événement ne fait rien.
+    Si le canal des logs n'est pas configuré, seul le statut est mis à jour.
     """
-    logsChannelId = database.get("logs_channel_id")
+    memberCountPresence.on_member_join(member)
+
+    logsChannelId = config.logsChannelId
     if not logsChannelId:
         return
 
-    await member.add_roles(member.guild.get_role(database.get("newbie_role_id")))
+    await member.add_roles(member.guild.get_role(config.newbieRoleId))
 
-    await bot.change_presence(
-        activity=discord.Activity(
-            name=f"{len(member.guild.members)} (really) cool members !",
-            type=discord.ActivityType.competing,
-        )
-    )
+    # Trouver quelle invitation a été utilisée (une seule récupération des invitations pour les arrivées groupées)
+    try:
+        usedInvite = await inviteTracker.attribute_join(member)
+    except discord.HTTPException:
+        usedInvite = None
 
-    logsChannel = bot.get_channel(logsChannelId)
-    if logsChannel:
-        # Récupérer les invitations après l'arrivée du membre
-        invitesAfter = await member.guild.invites()
-        invitesAfter = {inv.code: inv for inv in invitesAfter}
+    # Créer l'embed de base pour le nouveau membre
+    embed = discord.Embed(
+        title="Nouveau Membre",
+        description=f"{member.mention} a rejoint le serveur!",
+        color=discord.Color.green(),
+        timestamp=datetime.now(),
+    )
+    embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
+    embed.add_field(name="Compte créé le", value=member.created_at.strftime("%d/%m/%Y à %H:%M"), inline=False)
 
-        # Trouver quelle invitation a été utilisée
-        usedInvite = None
-        for inviteAfterCode, inviteAfter in invitesAfter.items():
-            if (
-                inviteAfterCode in invitesBefore[member.guild.id]
-                and inviteAfter.uses > invitesBefore[member.guild.id][inviteAfterCode].uses
-            ):
-                usedInvite = inviteAfter
-                break
-
-        # Mettre à jour la liste des invitations
-        invitesBefore[member.guild.id] = await member.guild.invites()
-        invitesBefore[member.guild.id] = {inv.code: inv for inv in invitesBefore[member.guild.id]}
-
-        # Créer l'embed de base pour le nouveau membre
-        embed = discord.Embed(
-            title="Nouveau Membre",
-            description=f"{member.mention} a rejoint le serveur!",
-            color=discord.Color.green(),
-            timestamp=datetime.now(),
+    # Ajouter les informations sur l'invitation si trouvée
+    if isinstance(usedInvite, it.AmbiguousJoin):
+        embed.add_field(
+            name="Invitation",
+            value=f"Ambiguë : {usedInvite.joins} arrivée(s) pour {usedInvite.uses} utilisation(s) de {', '.join(usedInvite.codes)}",
+            inline=True,
         )
-        embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-        embed.add_field(name="Compte créé le", value=member.created_at.strftime("%d/%m/%Y à %H:%M"), inline=False)
-
-        # Ajouter les informations sur l'invitation si trouvée
-        if usedInvite:
-            embed.add_field(name="Invité par", value=usedInvite.inviter.mention, inline=True)
-            embed.add_field(name="Code d'invitation", value=usedInvite.code, inline=True)
-            embed.add_field(
-                name="Utilisations",
-                value=f"{usedInvite.uses}/{usedInvite.max_uses if usedInvite.max_uses else '∞'}",
-                inline=True,
-            )
-        else:
-            embed.add_field(name="Invitation", value="Non trouvée", inline=True)
+    elif usedInvite:
+        embed.add_field(name="Invité par", value=usedInvite.inviter.mention if usedInvite.inviter else "Inconnu", inline=True)
+        embed.add_field(name="Code d'invitation", value=usedInvite.code, inline=True)
+        embed.add_field(
+            name="Utilisations",
+            value=f"{usedInvite.uses}/{usedInvite.maxUses if usedInvite.maxUses else '∞'}",
+            inline=True,
+        )
+    else:
+        embed.add_field(name="Invitation", value="Non trouvée", inline=True)
 
-        embed.set_footer(text=f"ID: {member.id}")
-        await logsChannel.send(embed=embed)
+    embed.set_footer(text=f"ID: {member.id}")
+    log.enqueue(embed, "join")
 
 
 @bot.event
-async def on_member_remove(member: discord.Member):
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
     """
     Événement appelé lorsque le bot détecte le départ d'un membre.
 
+    L'événement brut est utilisé car `on_member_remove` n'est pas appelé pour les membres absents du
+    cache (profil "lean") : `payload.user` est alors un `discord.User`, sans date d'arrivée.
+    Met à jour le nombre de membres affiché dans le statut du bot.
     Envoie un message dans le canal des logs avec les informations sur le membre parti.
-    Si le canal des logs n'est pas configuré, cet événement ne fait rien.
+    Si le canal des logs n'est pas configuré, aucun message n'est envoyé.
     """
-    logsChannelId = database.get("logs_channel_id")
+    memberCountPresence.on_raw_member_remove(payload)
+
+    logsChannelId = config.logsChannelId
     if not logsChannelId:
         return
 
-    logsChannel = bot.get_channel(logsChannelId)
-    if logsChannel:
-        embed = discord.Embed(
-            title="Membre Parti",
-            description=f"{member.display_name} a quitté le serveur",
-            color=discord.Color.red(),
-            timestamp=datetime.now(),
-        )
-        embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-        embed.add_field(name="Avait rejoint le", value=member.joined_at.strftime("%d/%m/%Y à %H:%M"), inline=False)
-        embed.set_footer(text=f"ID: {member.id}")
-        await logsChannel.send(embed=embed)
+    member = payload.user
+    embed = discord.Embed(
+        title="Membre Parti",
+        description=f"{member.display_name} a quitté le serveur",
+        color=discord.Color.red(),
+        timestamp=datetime.now(),
+    )
+    embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
+    joinedAt = getattr(member, "joined_at", None)
+    embed.add_field(
+        name="Avait rejoint le", value=joinedAt.strftime("%d/%m/%Y à %H:%M") if joinedAt else "Inconnu", inline=False
+    )
+    embed.set_footer(text=f"ID: {member.id}")
+    log.enqueue(embed, "leave")
 
 
 @bot.event
@@ -317,24 +488,22 @@ async def on_member_update(before: discord.Member, after: discord.Member):
     Si le canal des logs n'est pas configuré, cet événement ne fait rien.
     """
     if before.display_name != after.display_name:
-        logsChannelId = database.get("logs_channel_id")
+        logsChannelId = config.logsChannelId
         if not logsChannelId:
             return
 
-        logsChannel = bot.get_channel(logsChannelId)
-        if logsChannel:
-            embed = discord.Embed(
-                title="Changement de Pseudo",
-                description="Un membre a changé son pseudo",
-                color=discord.Color.blue(),
-                timestamp=datetime.now(),
-            )
-            embed.add_field(name="Membre", value=after.mention, inline=False)
-            embed.add_field(name="Ancien pseudo", value=before.display_name, inline=True)
-            embed.add_field(name="Nouveau pseudo", value=after.display_name, inline=True)
-            embed.set_thumbnail(url=after.avatar.url if after.avatar else after.default_avatar.url)
-            embed.set_footer(text=f"ID: {after.id}")
-            await logsChannel.send(embed=embed)
+        embed = discord.Embed(
+            title="Changement de Pseudo",
+            description="Un membre a changé son pseudo",
+            color=discord.Color.blue(),
+            timestamp=datetime.now(),
+        )
+        embed.add_field(name="Membre", value=after.mention, inline=False)
+        embed.add_field(name="Ancien pseudo", value=before.display_name, inline=True)
+        embed.add_field(name="Nouveau pseudo", value=after.display_name, inline=True)
+        embed.set_thumbnail(url=after.avatar.url if after.avatar else after.default_avatar.url)
+        embed.set_footer(text=f"ID: {after.id}")
+        log.enqueue(embed, "nickname")
 
 
 @bot.event
@@ -348,21 +517,81 @@ async def on_voice_state_update(member: discord.Member, before: discord.VoiceSta
     channel, le bot le supprime.
     """
 
-    if after.channel and after.channel.id == database.get("voc_create_channel_id"):
-        createdVocal = await after.channel.category.create_voice_channel(f"{member.display_name}")
-        tempVocalsChannelsId = database.get("temp_vocals_channel_id")
-        tempVocalsChannelsId.append(createdVocal.id)
-        database.modify("temp_vocals_channel_id", tempVocalsChannelsId)
-        await member.move_to(createdVocal)
-    if (
-        before.channel
-        and before.channel.id in database.get("temp_vocals_channel_id")
-        and len(before.channel.members) == 0
-    ):
-        tempVocalsChannelsId = database.get("temp_vocals_channel_id")
-        tempVocalsChannelsId.remove(before.channel.id)
-        database.modify("temp_vocals_channel_id", tempVocalsChannelsId)
-        await before.channel.delete()
+    await tempVoices.on_voice_state_update(member, before, after)
+
+
+@router.route("init_spectator")
+async def init_spectator(interaction: discord.Interaction, _):
+    """Bouton "Spectator !" du message de bienvenue."""
+    if not rl.has_role(interaction.user, config.registeredRoleId):
+        await interaction.user.add_roles(interaction.guild.get_role(config.spectatorRoleId))
+        await interaction.user.remove_roles(interaction.guild.get_role(config.newbieRoleId))
+        await interaction.response.send_message(
+            ":popcorn: Prepare your popcorns, you are now a spectator of the tournament !", ephemeral=True
+        )
+    else:
+        await interaction.response.send_message(
+            f":warning: {interaction.user.mention} :warning:\n\nYou are already registered, if you want to modify your registration, please contact an admin.",
+            ephemeral=True,
+        )
+
+
+@router.route("init_player")
+async def init_player(interaction: discord.Interaction, _):
+    """Bouton "Player !" du message de bienvenue."""
+    if rl.has_role(interaction.user, config.registeredRoleId):
+        await interaction.response.send_message(
+            f":warning: {interaction.user.mention} :warning:\n\nYou are already registered, if you want to modify your registration, please contact an admin.",
+            ephemeral=True,
+        )
+    else:
+        await interaction.response.send_modal(md.RegisterModal())
+
+
+async def bet_session_expired(interaction: discord.Interaction):
+    await interaction.response.edit_message(
+        content=":hourglass: This bet has expired, use the `/bet` command to bet again.", view=None
+    )
+
+
+@router.route("bet", bt.parse_bet_choice)
+async def bet_pick(interaction: discord.Interaction, payload: bt.BetChoice):
+    """Choix d'une équipe du podium : le bot demande l'équipe suivante, puis le nom à afficher."""
+    session = betSessions.get(payload.token, interaction.user.id)
+    if session is None or not 0 <= payload.teamIndex < len(session.teams):
+        await bet_session_expired(interaction)
+        return
+    team = session.teams[payload.teamIndex]
+    if len(session.picks) < 3 and team not in session.picks:
+        session.picks.append(team)
+    if len(session.picks) < 3:
+        content, view = bt.render_picks(session)
+    else:
+        content, view = bt.render_name_choice(session, interaction.user.display_name)
+    await interaction.response.edit_message(content=content, view=view)
+
+
+@router.route("anonymous", bt.parse_bet_name)
+async def bet_place(interaction: discord.Interaction, payload: bt.BetName):
+    """Choix du nom affiché : le bot place le pari et l'annonce dans le salon des paris."""
+    session = betSessions.get(payload.token, interaction.user.id)
+    if session is None or len(session.picks) != 3:
+        await bet_session_expired(interaction)
+        return
+    # Fermer la session avant d'enregistrer, pour qu'un double clic ne place pas deux paris
+    betSessions.close(session.token)
+    bet1, bet2, bet3 = session.picks
+    anonymous = payload.anonymous
+    # Le pari est enregistré avant de répondre : un pari déjà placé (autre session) ne doit pas être confirmé
+    await interaction.response.defer()
+    if not await hc.place_bet(interaction.user.id, bet1, bet2, bet3, anonymous, interaction.user.display_name):
+        await interaction.edit_original_response(content=":x: You have already placed a bet.", view=None)
+        return
+    await interaction.edit_original_response(
+        content="Perfect !\n\nThank you for your bet, stay tuned to get the results !", view=None
+    )
+    messageToSend = f"{'Anonymous' if anonymous else interaction.user.mention} has placed a bet : \n\n- :first_place: : {bet1}\n- :second_place: : {bet2}\n- :third_place: : {bet3}\n\nPlace your own bet using the `/bet` command !"
+    await interaction.guild.get_channel(config.betsChannelId).send(messageToSend)
 
 
 @bot.event
@@ -370,108 +599,14 @@ async def on_interaction(interaction: discord.Interaction):
     """
     Événement appelé lorsque le bot détecte une interaction avec un bouton custom.
 
-    Si l'interaction est une commande de pari, le bot envoie un message pour demander à l'utilisateur de choisir la 1ère équipe, puis la 2e, puis la 3e.
-    Si l'interaction est un bouton de pari, le bot enregistre le pari et envoie un message pour demander à l'utilisateur de choisir le nom sous lequel le pari sera affiché.
-
-    Si l'interaction est un bouton d'affichage du nom du pari, le bot enregistre si le pari est anonyme ou non, et envoie un message pour confirmer le pari.
-    Si l'interaction est un bouton de placement de pari, le bot place le pari et envoie un message pour afficher le pari.
+    Le custom_id du composant est transmis au routeur (`router`), qui appelle la fonction enregistrée pour son préfixe :
+    - init_player / init_spectator : inscription en tant que joueur ou spectateur depuis le message de bienvenue.
+    - bet : choix d'une équipe du podium (session de pari `betSessions`), le bot demande l'équipe suivante,
+      puis sous quel nom le pari sera affiché.
+    - anonymous : le bot place le pari et l'annonce dans le salon des paris.
+    Les composants des vues discord.py sont gérés par leur vue.
     """
-    if "custom_id" in interaction.data.keys():
-        if interaction.data["custom_id"] == "init_spectator":
-            if interaction.guild.get_role(database.get("registered_role_id")) not in interaction.user.roles:
-                await interaction.user.add_roles(interaction.guild.get_role(database.get("spectator_role_id")))
-                await interaction.user.remove_roles(interaction.guild.get_role(database.get("newbie_role_id")))
-                await interaction.response.send_message(
-                    ":popcorn: Prepare your popcorns, you are now a spectator of the tournament !", ephemeral=True
-                )
-            else:
-                await interaction.response.send_message(
-                    f":warning: {interaction.user.mention} :warning:\n\nYou are already registered, if you want to modify your registration, please contact an admin.",
-                    ephemeral=True,
-                )
-        elif interaction.data["custom_id"] == "init_player":
-            if interaction.guild.get_role(database.get("registered_role_id")) in interaction.user.roles:
-                await interaction.response.send_message(
-                    f":warning: {interaction.user.mention} :warning:\n\nYou are already registered, if you want to modify your registration, please contact an admin.",
-                    ephemeral=True,
-                )
-            else:
-                await interaction.response.send_modal(md.RegisterModal())
-        elif "bet1" in interaction.data["custom_id"]:
-            bet1 = interaction.data["custom_id"].split(".")[1]
-            buttons = []
-            for component in interaction.message.components:
-                buttons.extend([child for child in component.children])
-            view = discord.ui.View()
-            for button in buttons:
-                if button.label == bet1:
-                    view.add_item(
-                        discord.ui.Button(label=button.label + " (1st)", style=discord.ButtonStyle.green, disabled=True)
-                    )
-                else:
-                    view.add_item(
-                        discord.ui.Button(
-                            label=button.label,
-                            custom_id=f"bet2.{bet1}.{button.label}",
-                            style=button.style,
-                            disabled=True if button.style == discord.ButtonStyle.green else False,
-                        )
-                    )
-            await interaction.response.edit_message(content="Which team will finish 2nd of this Hellcup ?", view=view)
-        elif "bet2" in interaction.data["custom_id"]:
-            bet1 = interaction.data["custom_id"].split(".")[1]
-            bet2 = interaction.data["custom_id"].split(".")[2]
-            buttons = []
-            for component in interaction.message.components:
-                buttons.extend([child for child in component.children])
-            view = discord.ui.View()
-            for button in buttons:
-                if button.label == bet2:
-                    view.add_item(
-                        discord.ui.Button(label=button.label + " (2nd)", style=discord.ButtonStyle.green, disabled=True)
-                    )
-                else:
-                    view.add_item(
-                        discord.ui.Button(
-                            label=button.label,
-                            custom_id=f"bet3.{bet1}.{bet2}.{button.label}",
-                            style=button.style,
-                            disabled=True if button.style == discord.ButtonStyle.green else False,
-                        )
-                    )
-            await interaction.response.edit_message(content="Which team will finish 3rd of this Hellcup ?", view=view)
-        elif "bet3" in interaction.data["custom_id"]:
-            bet1 = interaction.data["custom_id"].split(".")[1]
-            bet2 = interaction.data["custom_id"].split(".")[2]
-            bet3 = interaction.data["custom_id"].split(".")[3]
-            betsMessage = f"Here's the recap of your bets !\n\n- :first_place: : {bet1}\n- :second_place: : {bet2}\n- :third_place: : {bet3}\n\nUnder what name do you want the bet to be displayed ?\n"
-            view = discord.ui.View()
-            view.add_item(
-                discord.ui.Button(
-                    label=interaction.user.display_name,
-                    custom_id=f"anonymous.no.{bet1}.{bet2}.{bet3}",
-                    style=discord.ButtonStyle.primary,
-                )
-            )
-            view.add_item(
-                discord.ui.Button(
-                    label="Anonymous",
-                    custom_id=f"anonymous.yes.{bet1}.{bet2}.{bet3}",
-                    style=discord.ButtonStyle.primary,
-                )
-            )
-            await interaction.response.edit_message(content=betsMessage, view=view)
-        elif "anonymous" in interaction.data["custom_id"]:
-            bet1 = interaction.data["custom_id"].split(".")[2]
-            bet2 = interaction.data["custom_id"].split(".")[3]
-            bet3 = interaction.data["custom_id"].split(".")[4]
-            anonymous = True if interaction.data["custom_id"].split(".")[1] == "yes" else False
-            await interaction.response.edit_message(
-                content="Perfect !\n\nThank you for your bet, stay tuned to get the results !", view=None
-            )
-            messageToSend = f"{'Anonymous' if anonymous else interaction.user.mention} has placed a bet : \n\n- :first_place: : {bet1}\n- :second_place: : {bet2}\n- :third_place: : {bet3}\n\nPlace your own bet using the `/bet` command !"
-            await hc.place_bet(interaction.user.id, bet1, bet2, bet3, anonymous, interaction.user.display_name)
-            await interaction.guild.get_channel(database.get("bets_channel_id")).send(messageToSend)
+    await router.dispatch(interaction)
 
 
 @bot.tree.command(name="team", description="Create your team !")
@@ -480,28 +615,28 @@ async def team(interaction: discord.Interaction):
     Create your team !
 
     Si vous êtes deja inscrit en tant que joueur, vous ne pouvez pas utiliser cette commande.
-    Si vous êtes inscrit en tant que spectateur, vous ne pouvez pas utiliser cette commande, si vous voulez jouer, rdv dans le channel {interaction.guild.get_channel(db.get('rules_channel_id')).mention} !
+    Si vous êtes inscrit en tant que spectateur, vous ne pouvez pas utiliser cette commande, si vous voulez jouer, rdv dans le channel {interaction.guild.get_channel(config.rulesChannelId).mention} !
     """
     if isinstance(interaction.channel, discord.DMChannel):
         await interaction.response.send_message("This command can only be used on the main server !", ephemeral=True)
         return
 
-    if interaction.user in interaction.guild.get_role(database.get("player_role_id")).members:
+    if rl.has_role(interaction.user, config.playerRoleId):
         await interaction.response.send_message(
             f":warning: {interaction.user.mention} :warning:\n\nYou already have a team !", ephemeral=True
         )
-    elif interaction.user in interaction.guild.get_role(database.get("spectator_role_id")).members:
+    elif rl.has_role(interaction.user, config.spectatorRoleId):
         await interaction.response.send_message(
-            f":warning: {interaction.user.mention} :warning:\n\nYou are registered as a spectator, if you want to play, go to the channel {interaction.guild.get_channel(database.get('rules_channel_id')).mention} !",
+            f":warning: {interaction.user.mention} :warning:\n\nYou are registered as a spectator, if you want to play, go to the channel {interaction.guild.get_channel(config.rulesChannelId).mention} !",
             ephemeral=True,
         )
-    elif interaction.user not in interaction.guild.get_role(database.get("registered_role_id")).members:
+    elif not rl.has_role(interaction.user, config.registeredRoleId):
         await interaction.response.send_message(
-            f":warning: {interaction.user.mention} :warning:\n\nYou are not registered as a player, if you want to play, go to the channel {interaction.guild.get_channel(database.get('rules_channel_id')).mention} !",
+            f":warning: {interaction.user.mention} :warning:\n\nYou are not registered as a player, if you want to play, go to the channel {interaction.guild.get_channel(config.rulesChannelId).mention} !",
             ephemeral=True,
         )
     else:
-        layoutView = lv.TeamInscriptionLayoutView(interaction, log, database)
+        layoutView = lv.TeamInscriptionLayoutView(interaction, log, config)
         await interaction.response.send_message(view=layoutView, ephemeral=True)
     return
 
@@ -519,13 +654,10 @@ async def bet(interaction: discord.Interaction):
     if not teamsList:
         await interaction.followup.send(":x: You have already bet for this edition.", ephemeral=True)
     else:
-        view = discord.ui.View()
         shuffle(teamsList)
-        for teamTemp in teamsList:
-            view.add_item(
-                discord.ui.Button(label=teamTemp, custom_id=f"bet1.{teamTemp}", style=discord.ButtonStyle.primary)
-            )
-        await interaction.followup.send("Which team will win this Hellcup ?", view=view, ephemeral=True)
+        session = betSessions.create(interaction.user.id, teamsList)
+        content, view = bt.render_picks(session)
+        await interaction.followup.send(content, view=view, ephemeral=True)
 
 
 @bot.event
@@ -536,6 +668,10 @@ async def on_message(message: discord.Message):
     La commande $send <message> envoie le message <message> sur le channel actuel.
     La commande $stop_inscription désactive le bouton d'inscription.
     La commande $start_inscription réactive le bouton d'inscription.
+    La commande $refresh_bets recharge les paris et les équipes qualifiées depuis le Google Sheet (après une modification à la main).
+    La commande $sheets_stats affiche l'état des quotas Google Sheets (file d'attente, temps d'attente, retries).
+    La commande $refresh_elo récupère l'ELO de tous les inscrits et l'écrit dans la colonne "ELO" de la feuille "Inscrits" (son en-tête doit exister).
+    La commande $cache_stats affiche la taille des caches du bot (nombre d'objets et mémoire approximative).
     La commande $add_invite <link> <name> ajoute l'invitation <link> au dictionnaire des invitations avec le nom <name>.
     La commande $test vérifie si le serveur a plus de 48 catégories de salons d'équipes et créé une nouvelle si c'est le cas.
     La commande $initmessagebienvenue envoie un message de bienvenue sur le serveur avec un embed et deux boutons pour s'inscrire en tant que joueur ou spectateur.
@@ -545,6 +681,8 @@ async def on_message(message: discord.Message):
     if message.author.bot or isinstance(message.channel, discord.DMChannel):
         return
 
+    messageStore.add(message)
+
     # Continuer le traitement des autres commandes
     await bot.process_commands(message)
 
@@ -572,8 +710,8 @@ async def on_message(message: discord.Message):
             await message.delete()
 
         elif message.content == "$stop_inscription":
-            messageToModify = await message.guild.get_channel(database.get("rules_channel_id")).fetch_message(
-                database.get("signup_message_id")
+            messageToModify = await message.guild.get_channel(config.rulesChannelId).fetch_message(
+                config.signupMessageId
             )
             view = discord.ui.View(timeout=None)
             view.add_item(
@@ -594,8 +732,8 @@ async def on_message(message: discord.Message):
             await messageToModify.edit(content=messageToModify.content, embed=messageToModify.embeds[0], view=view)
 
         elif message.content == "$start_inscription":
-            messageToModify = await message.guild.get_channel(database.get("rules_channel_id")).fetch_message(
-                database.get("signup_message_id")
+            messageToModify = await message.guild.get_channel(config.rulesChannelId).fetch_message(
+                config.signupMessageId
             )
             view = discord.ui.View(timeout=None)
             view.add_item(
@@ -617,18 +755,61 @@ async def on_message(message: discord.Message):
 
         elif message.content.startswith("$add_invite"):
             _, link, name = message.content.split(" ", 2)
-            invitDict = database.get("invit_to_check")
-            invitDict[link.split("/")[-1]] = name
-            database.modify("invit_to_check", invitDict)
+            config.update(invitToCheck={**config.invitToCheck, link.split("/")[-1]: name})
+
+        elif message.content == "$refresh_bets":
+            try:
+                if sheetSync is not None:
+                    # Avec SQLite, /bet lit les tables locales : on réimporte "Bets" et "Qualifiés" maintenant
+                    await sheetSync.import_once()
+                    await message.channel.send("✅ Paris et équipes qualifiées réimportés du Google Sheet.", delete_after=5)
+                else:
+                    gu.invalidate_bets_cache()
+                    await message.channel.send("✅ Cache des paris et des équipes qualifiées vidé.", delete_after=5)
+            except Exception as e:
+                await message.channel.send(f"❌ Erreur lors de l'import du Google Sheet : {e}", delete_after=10)
+                await log.send_log_embed("Impossible de réimporter les paris", dl.LogLevels.ERROR, e)
+            await message.delete()
+
+        elif message.content == "$sheets_stats":
+            stats = gu.scheduler.stats()
+            await message.channel.send(
+                "📊 Google Sheets\n"
+                + "\n".join(
+                    f"- {kind} : {stats[kind]['queued']} en attente, {stats[kind]['granted']} appels, "
+                    f"attente moy. {stats[kind]['waitAverageMs']} ms / max {stats[kind]['waitMaxMs']} ms"
+                    for kind in ("read", "write")
+                )
+                + f"\n- {stats['retries']} retries dont {stats['quotaExceeded']} quotas dépassés (429)"
+            )
+
+        elif message.content == "$refresh_elo":
+            if eloRefresh.running:
+                statusMessage = await message.channel.send(
+                    "⏳ Un rafraîchissement des ELO est déjà en cours, le résultat suivra..."
+                )
+            else:
+                statusMessage = await message.channel.send("🔄 Rafraîchissement des ELO en cours...")
+            try:
+                # Attend le rafraîchissement en cours s'il y en a un, sans en relancer un second
+                eloReport = await eloRefresh.run()
+                await statusMessage.edit(content=f"✅ ELO rafraîchis : {eloReport}")
+            except Exception as e:
+                await statusMessage.edit(content=f"❌ Erreur lors du rafraîchissement des ELO : {e}")
+                await log.send_log_embed("Impossible de rafraîchir les ELO", dl.LogLevels.ERROR, e)
+
+        elif message.content == "$cache_stats":
+            report = cp.format_cache_report(cp.cache_report(bot, messageStore))
+            await message.channel.send(f"🧠 Caches ({os.getenv('HELLBOT_CACHE_PROFILE', 'default')})\n{report}")
 
         elif message.content == "$test":
-            category = message.guild.get_channel(database.get("team_text_channels_category_id"))
+            category = message.guild.get_channel(config.teamTextChannelsCategoryId)
             print(category.position)
             print(len(category.channels))
             if len(category.channels) > 48:
                 count = sum([1 for c in category.guild.categories if c.name.lower().startswith("salons d'équipes")])
                 newCategory = await message.guild.create_category_channel(f"Salons d'équipes {count + 1}")
-                database.modify("team_text_channels_category_id", newCategory.id)
+                config.update(teamTextChannelsCategoryId=newCategory.id)
             else:
                 print(category.name)
 
@@ -647,8 +828,8 @@ async def on_message(message: discord.Message):
                 inline=False,
             )
             e.set_footer(text="©HellBot")
-            await message.guild.get_channel(database.get("rules_channel_id")).send(embed=e, view=view)
-            database.modify("signup_message_id", message.id)
+            await message.guild.get_channel(config.rulesChannelId).send(embed=e, view=view)
+            config.update(signupMessageId=message.id)
 
 
 # @bot.command(name='hello')
@@ -0,0 +1,118 @@
+import itertools
+import sys
+from array import array
+from typing import Iterable
+
+import discord
+
+import message_store as ms
+
+# Types comptés dans la taille d'un objet : les références vers d'autres objets discord.py (serveur,
+# état de la connexion, utilisateur partagé) ne le sont pas, ils ont leur propre cache
+_OWNED_TYPES = (str, bytes, int, float, array, list, tuple, dict, set, frozenset)
+
+
+def _intents() -> discord.Intents:
+    """The gateway events used by the handlers of bot.py."""
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.members = True  # arrivées, départs, changements de pseudo, rôles
+    intents.guild_messages = True
+    intents.message_content = True  # commandes $ et logs des messages supprimés/modifiés
+    intents.invites = True
+    intents.voice_states = True  # salons vocaux temporaires
+    return intents
+
+
+def _lean_member_cache_flags() -> discord.MemberCacheFlags:
+    """Only the members in a voice channel (`MemberCacheFlags(voice=True, joined=True)` equals `all()`)."""
+    flags = discord.MemberCacheFlags.none()
+    flags.voice = True
+    return flags
+
+
+def client_options(profile: str = "default") -> dict:
+    """
+    Builds the intents and cache options of the bot from a profile name.
+
+    - "full": every intent and every cache (the former behaviour).
+    - "default": only the intents used by the handlers, every member cached at startup. No presences,
+      typing or reactions.
+    - "lean": the same intents, but only the members in a voice channel are cached (the temporary
+      voice channels need them), without chunking at startup, and a smaller message cache (the
+      deleted and edited messages are found in `message_store`). Trade-off: the other members are
+      not cached, and discord.py drops the events that need the previous member. For them:
+      `on_member_update` is never called, so nickname changes are not logged; `on_member_remove` is
+      not called either (bot.py uses `on_raw_member_remove`, the leave log then has no join date);
+      `guild.get_member` returns None, so lookups fall back to an API call (`fetch_member`).
+
+    Returns:
+        dict: Keyword arguments for `commands.Bot`.
+    """
+    if profile == "full":
+        return {"intents": discord.Intents.all(), "member_cache_flags": discord.MemberCacheFlags.all()}
+    if profile == "default":
+        intents = _intents()
+        return {"intents": intents, "member_cache_flags": discord.MemberCacheFlags.from_intents(intents)}
+    if profile == "lean":
+        return {
+            "intents": _intents(),
+            "member_cache_flags": _lean_member_cache_flags(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": 200,
+        }
+    raise ValueError(f"Unknown cache profile: {profile}")
+
+
+def approximate_size(obj) -> int:
+    """Size of an object and of the values it owns (strings, numbers, lists...), in bytes."""
+    size = sys.getsizeof(obj)
+    slots = itertools.chain.from_iterable(getattr(cls, "__slots__", ()) for cls in type(obj).__mro__)
+    values = [getattr(obj, slot, None) for slot in slots]
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+        values.extend(obj.__dict__.values())
+    for value in values:
+        if isinstance(value, _OWNED_TYPES):
+            size += sys.getsizeof(value)
+    return size
+
+
+def _estimate(objects: Iterable, count: int, sampleSize: int = 200) -> int:
+    sample = list(itertools.islice(objects, sampleSize))
+    if not sample:
+        return 0
+    return sum(approximate_size(obj) for obj in sample) * count // len(sample)
+
+
+def cache_report(client: discord.Client, messageStore: ms.MessageContentStore) -> list[tuple[str, int, int]]:
+    """
+    Measures the caches of the bot.
+
+    The memory is estimated from a sample of each cache, so it is an order of magnitude to compare
+    profiles, not an exact figure.
+
+    Returns:
+        list[tuple[str, int, int]]: (cache name, number of objects, approximate bytes) for each cache.
+    """
+    guilds = client.guilds
+    members = [member for guild in guilds for member in guild.members]
+    channels = [channel for guild in guilds for channel in guild.channels]
+    roles = [role for guild in guilds for role in guild.roles]
+    users = client.users
+    messages = list(client.cached_messages)
+    return [
+        ("guilds", len(guilds), _estimate(guilds, len(guilds))),
+        ("members", len(members), _estimate(members, len(members))),
+        ("users", len(users), _estimate(users, len(users))),
+        ("channels", len(channels), _estimate(channels, len(channels))),
+        ("roles", len(roles), _estimate(roles, len(roles))),
+        ("messages", len(messages), _estimate(messages, len(messages))),
+        ("message_store", len(messageStore), messageStore.size),
+    ]
+
+
+def format_cache_report(report: list[tuple[str, int, int]]) -> str:
+    lines = [f"- {name} : {count} objets, ~{size / 1024 / 1024:.1f} Mo" for name, count, size in report]
+    lines.append(f"- total : ~{sum(size for _, _, size in report) / 1024 / 1024:.1f} Mo")
+    return "\n".join(lines)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import tempfile
+import traceback
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+from easyDB import DB
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "json", "config.json")
+
+# Nom de chaque champ dans le fichier (et dans l'ancienne base easyDB "hellbot")
+_KEYS = {
+    "logsChannelId": "logs_channel_id",
+    "newbieRoleId": "newbie_role_id",
+    "hellcupGuildId": "hellcup_guild_id",
+    "spectatorRoleId": "spectator_role_id",
+    "playerRoleId": "player_role_id",
+    "registeredRoleId": "registered_role_id",
+    "rulesChannelId": "rules_channel_id",
+    "registrationChannelId": "registration_channel_id",
+    "teamTextChannelsCategoryId": "team_text_channels_category_id",
+    "adminRoleId": "admin_role_id",
+    "newTeamChannelId": "new_team_channel_id",
+    "varRoleId": "var_role_id",
+    "vocCreateChannelId": "voc_create_channel_id",
+    "tempVocalsChannelId": "temp_vocals_channel_id",
+    "invitMessageId": "invit_message_id",
+    "invitToCheck": "invit_to_check",
+    "signupMessageId": "signup_message_id",
+    "betsChannelId": "bets_channel_id",
+}
+
+
+@dataclass
+class BotConfig:
+    """
+    Snapshot of the bot configuration, loaded once and shared by every module.
+
+    The values are read from the JSON file at `path`, which is reloaded when it changes on disk
+    (see `watch`) and rewritten atomically by `update`.
+    """
+
+    logsChannelId: int = 0
+    newbieRoleId: int = 0
+    hellcupGuildId: int = 0
+    spectatorRoleId: int = 0
+    playerRoleId: int = 0
+    registeredRoleId: int = 0
+    rulesChannelId: int = 0
+    registrationChannelId: int = 0
+    teamTextChannelsCategoryId: int = 0
+    adminRoleId: int = 0
+    newTeamChannelId: int = 0
+    varRoleId: int = 0
+    vocCreateChannelId: int = 0
+    tempVocalsChannelId: list[int] = field(default_factory=list)
+    invitMessageId: int = 0
+    invitToCheck: dict[str, str] = field(default_factory=dict)
+    signupMessageId: int = 0
+    betsChannelId: int = 0
+    path: str = field(default=CONFIG_PATH, repr=False)
+    _mtime: Optional[int] = field(default=None, repr=False)
+
+    def _set_from_dict(self, data: dict):
+        for configField in fields(self):
+            key = _KEYS.get(configField.name)
+            if key is None or data.get(key) is None:
+                continue
+            value = data[key]
+            if configField.type is int:
+                value = int(value)
+            elif configField.type == list[int]:
+                value = [int(item) for item in value]
+            elif configField.type == dict[str, str]:
+                value = {str(code): str(name) for code, name in value.items()}
+            setattr(self, configField.name, value)
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, name) for name, key in _KEYS.items()}
+
+    def load(self):
+        """
+        Loads the configuration file, in place so that every holder of this object sees the new values.
+
+        If the file does not exist yet, it is created from the easyDB database "hellbot" (see add_in_db.py).
+        """
+        if not os.path.exists(self.path):
+            database = DB("hellbot", verbose=False)
+            self._set_from_dict({key: database.get(key) for key in _KEYS.values()})
+            self.save()
+            return
+        with open(self.path, encoding="utf-8") as configFile:
+            self._set_from_dict(json.load(configFile))
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def save(self):
+        """Writes the configuration file atomically (temporary file then rename)."""
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fileDescriptor, temporaryPath = tempfile.mkstemp(dir=directory, prefix=".config.", suffix=".json")
+        try:
+            with os.fdopen(fileDescriptor, "w", encoding="utf-8") as temporaryFile:
+                json.dump(self.to_dict(), temporaryFile, ensure_ascii=False, indent=4)
+                temporaryFile.flush()
+                os.fsync(temporaryFile.fileno())
+            os.replace(temporaryPath, self.path)
+        except BaseException:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def update(self, **values):
+        """
+        Modifies some fields and writes the file through.
+
+        Example: `config.update(teamTextChannelsCategoryId=newCategory.id)`
+        """
+        for name, value in values.items():
+            if name not in _KEYS:
+                raise AttributeError(f"Unknown configuration field: {name}")
+            setattr(self, name, value)
+        self.save()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the file if it was modified by someone else since the last load or save.
+
+        Returns:
+            bool: True if the configuration was reloaded.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self.load()
+        return True
+
+    async def watch(self, interval: float = 5):
+        """Background task reloading the configuration when the file changes."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.reload_if_changed():
+                    print(f"Configuration rechargée depuis {self.path}")
+            except Exception:
+                traceback.print_exc()
+
+
+def load_config(path: str = CONFIG_PATH) -> BotConfig:
+    config = BotConfig(path=path)
+    config.load()
+    return config
+
+
+# Configuration partagée par bot.py, modals.py et layoutViews.py
+config = load_config()
@@ -1,10 +1,29 @@
+import asyncio
 import platform
+import time
+import traceback
+from collections import deque
 from datetime import datetime
 from enum import Enum
 from typing import Optional
 
 import discord
 
+# Limites Discord pour un message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBEDS_CHARACTERS = 6000
+
+# Libellés des catégories dans le résumé des événements abandonnés
+CATEGORY_LABELS = {
+    "deletion": "suppressions",
+    "edit": "modifications",
+    "join": "arrivées",
+    "leave": "départs",
+    "nickname": "changements de pseudo",
+    "invite": "invitations",
+    "log": "logs",
+}
+
 
 class LogLevels(Enum):
     DEBUG = discord.Color.blue()
@@ -14,15 +33,34 @@ class LogLevels(Enum):
 
 
 class DiscordLog:
-    def __init__(self, logChannelId: int):
+    def __init__(
+        self, logChannelId: int, flushDelay: float = 2.0, maxQueueSize: int = 500, overflowPolicy: str = "drop_oldest"
+    ):
         """
         Initialize a DiscordLog object.
 
+        The embeds are not sent one by one: they are queued and sent up to 10 per message, when
+        10 embeds are waiting or `flushDelay` seconds after the first one. When the queue is full,
+        the overflow policy drops events ("drop_oldest" or "drop_newest") and the next message
+        ends with a summary of what was dropped.
+
         Args:
             logChannelId (int): The ID of the channel to send logs to
+            flushDelay (float, optional): Maximum time (in seconds) an embed waits before being sent. Defaults to 2.0.
+            maxQueueSize (int, optional): Maximum number of embeds waiting to be sent. Defaults to 500.
+            overflowPolicy (str, optional): "drop_oldest" or "drop_newest". Defaults to "drop_oldest".
         """
+        if overflowPolicy not in ("drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown overflow policy: {overflowPolicy}")
         self.logChannelId = logChannelId
         self.guild = None
+        self.flushDelay = flushDelay
+        self.maxQueueSize = maxQueueSize
+        self.overflowPolicy = overflowPolicy
+        self.queue: deque[tuple[discord.Embed, str, Optional[discord.File]]] = deque()
+        self.dropped: dict[str, int] = {}
+        self._queueEvent: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
 
     def add_guild(self, guild: discord.Guild):
         """
@@ -34,6 +72,97 @@ class DiscordLog:
 
         self.guild = guild
 
+    def enqueue(self, embed: discord.Embed, category: str = "log", file: Optional[discord.File] = None):
+        """
+        Queues an embed for the log channel, without waiting for it to be sent.
+
+        Args:
+            embed (discord.Embed): The embed to send.
+            category (str, optional): The kind of event, used to summarise dropped events. Defaults to "log".
+            file (discord.File, optional): A file to attach to the message. Defaults to None.
+        """
+        if len(self.queue) >= self.maxQueueSize:
+            if self.overflowPolicy == "drop_newest":
+                self.dropped[category] = self.dropped.get(category, 0) + 1
+                return
+            _, droppedCategory, _ = self.queue.popleft()
+            self.dropped[droppedCategory] = self.dropped.get(droppedCategory, 0) + 1
+        self.queue.append((embed, category, file))
+        if self._worker is None or self._worker.done():
+            self._queueEvent = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+        self._queueEvent.set()
+
+    def _dropped_summary(self) -> Optional[discord.Embed]:
+        if not self.dropped:
+            return None
+        summary = "\n".join(
+            f"+{count} {CATEGORY_LABELS.get(category, category)} de plus" for category, count in self.dropped.items()
+        )
+        self.dropped = {}
+        return discord.Embed(
+            title="Événements non logués (trop d'événements)",
+            description=summary,
+            color=discord.Color.dark_grey(),
+            timestamp=datetime.now(),
+        )
+
+    def _next_batch(self) -> tuple[list[discord.Embed], list[discord.File]]:
+        items, size = [], 0
+        while self.queue and len(items) < MAX_EMBEDS_PER_MESSAGE:
+            embedSize = len(self.queue[0][0])
+            if items and size + embedSize > MAX_EMBEDS_CHARACTERS:
+                break
+            items.append(self.queue.popleft())
+            size += embedSize
+        summary = self._dropped_summary()
+        if summary is not None:
+            if len(items) == MAX_EMBEDS_PER_MESSAGE or size + len(summary) > MAX_EMBEDS_CHARACTERS:
+                self.queue.appendleft(items.pop())
+            items.append((summary, "log", None))
+        return [embed for embed, _, _ in items], [file for _, _, file in items if file is not None]
+
+    async def _run(self):
+        while True:
+            await self._queueEvent.wait()
+            # Laisser le temps aux événements suivants d'arriver pour remplir le message
+            deadline = time.monotonic() + self.flushDelay
+            while len(self.queue) < MAX_EMBEDS_PER_MESSAGE and time.monotonic() < deadline:
+                self._queueEvent.clear()
+                try:
+                    await asyncio.wait_for(self._queueEvent.wait(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+            self._queueEvent.clear()
+            if not await self.flush():
+                await asyncio.sleep(self.flushDelay)  # salon pas encore disponible
+            if self.queue or self.dropped:
+                self._queueEvent.set()
+
+    async def flush(self) -> bool:
+        """
+        Sends every queued embed, 10 per message.
+
+        Returns:
+            bool: False if the log channel is not available yet (the embeds stay in the queue).
+        """
+        channel = self.guild.get_channel(self.logChannelId) if self.guild else None
+        if channel is None:
+            return False
+        while self.queue or self.dropped:
+            batch, files = self._next_batch()
+            try:
+                await channel.send(embeds=batch, files=files)
+            except discord.HTTPException:
+                traceback.print_exc()
+        return True
+
+    async def close(self):
+        """Sends what is left in the queue and stops the worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+        await self.flush()
+
     async def send_log_embed(
         self, logMessage: str, logLevel: LogLevels = LogLevels.INFO, extraInfo: Optional[str] = None
     ):
@@ -55,4 +184,4 @@ class DiscordLog:
         )
         if extraInfo is not None:
             embed.add_field(name="Extra Info", value=extraInfo[-900:], inline=False)
-        await self.guild.get_channel(self.logChannelId).send(embed=embed)
+        self.enqueue(embed, "log")
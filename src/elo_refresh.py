@@ -0,0 +1,229 @@
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+
+import discord_logs as dl
+import geoguessr_api as gg
+import gspread_utilities as gu
+import registrations_mirror as rm
+import sheets_scheduler as ss
+import storage as st
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), "..", "json", "elo_refresh_checkpoint.json")
+ELO_HEADER = "ELO"
+
+
+@dataclass
+class EloRefreshReport:
+    players: int
+    fetched: int
+    resumed: int
+    failed: int
+    written: int
+    elapsed: float
+
+    @property
+    def playersPerSecond(self) -> float:
+        return self.fetched / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.players} joueurs : {self.fetched} ELO récupérés en {self.elapsed:.1f} s "
+            f"({self.playersPerSecond:.1f} joueurs/s), {self.resumed} repris du point de reprise, "
+            f"{self.failed} échecs, {self.written} lignes écrites dans la feuille"
+        )
+
+
+class EloRefreshJob:
+    """
+    Refreshes the ranked ELO of every registered player and writes it in the "ELO" column of "Inscrits".
+
+    The ratings are fetched by at most `concurrency` requests at a time and `requestsPerMinute`
+    per minute; on a 429 every worker waits for the time asked by GeoGuessr. The ratings already
+    fetched are saved in a checkpoint file, so an interrupted run resumes where it stopped. At the
+    end, the whole column is written with a single `batch_update`. The column must already have its
+    "ELO" header: it is checked before fetching anything. Only one run goes on at a time, a second
+    call waits for it and gets its report.
+    """
+
+    def __init__(
+        self,
+        client: gg.GeoGuessrClient,
+        store: st.StorageBackend,
+        concurrency: int = 5,
+        requestsPerMinute: float = 120,
+        checkpointPath: str = CHECKPOINT_PATH,
+        checkpointEvery: int = 25,
+        checkpointMaxAge: float = 12 * 3600,
+    ):
+        """
+        Args:
+            client (GeoGuessrClient): The client of the GeoGuessr API.
+            store (StorageBackend): The source of the registered players.
+            concurrency (int, optional): Maximum number of requests at the same time. Defaults to 5.
+            requestsPerMinute (float, optional): Maximum number of requests per minute. Defaults to 120.
+            checkpointPath (str, optional): File of the checkpoint. Defaults to CHECKPOINT_PATH.
+            checkpointEvery (int, optional): Number of ratings between two checkpoint writes. Defaults to 25.
+            checkpointMaxAge (float, optional): Age in seconds of a checkpoint too old to resume from. Defaults to 12 hours.
+        """
+        self.client = client
+        self.store = store
+        self.concurrency = concurrency
+        self.bucket = ss.TokenBucket(requestsPerMinute, capacity=concurrency)
+        self.checkpointPath = checkpointPath
+        self.checkpointEvery = checkpointEvery
+        self.checkpointMaxAge = checkpointMaxAge
+        self._runTask: Optional[asyncio.Task] = None
+        self.lastReport: Optional[EloRefreshReport] = None
+        self._pausedUntil = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._runTask is not None and not self._runTask.done()
+
+    def _load_checkpoint(self) -> tuple[float, dict[str, Optional[int]]]:
+        """Returns the start date and the ratings of the interrupted run, or a new run."""
+        if os.path.exists(self.checkpointPath):
+            try:
+                with open(self.checkpointPath, encoding="utf-8") as checkpointFile:
+                    checkpoint = json.load(checkpointFile)
+                if time.time() - checkpoint["startedAt"] <= self.checkpointMaxAge:
+                    return checkpoint["startedAt"], checkpoint["ratings"]
+            except (OSError, ValueError, KeyError):
+                traceback.print_exc()
+        return time.time(), {}
+
+    def _save_checkpoint(self, startedAt: float, ratings: dict[str, Optional[int]]):
+        directory = os.path.dirname(self.checkpointPath)
+        os.makedirs(directory, exist_ok=True)
+        fileDescriptor, temporaryPath = tempfile.mkstemp(dir=directory, prefix=".elo_refresh.", suffix=".json")
+        try:
+            with os.fdopen(fileDescriptor, "w", encoding="utf-8") as temporaryFile:
+                json.dump({"startedAt": startedAt, "ratings": ratings}, temporaryFile)
+            os.replace(temporaryPath, self.checkpointPath)
+        except BaseException:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
+
+    def _remove_checkpoint(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.checkpointPath)
+
+    async def _wait_for_turn(self):
+        while True:
+            delay = max(self._pausedUntil - time.monotonic(), self.bucket.time_until_token())
+            if delay <= 0:
+                self.bucket.take()
+                return
+            await asyncio.sleep(delay)
+
+    async def _fetch_rating(self, geoguessrId: str, maxRetries: int = 3) -> Optional[int]:
+        """Returns the rating of a player (None if they are not ranked)."""
+        for attempt in range(maxRetries + 1):
+            await self._wait_for_turn()
+            try:
+                progress = await self.client.get_json(f"/api/v4/ranked-system/progress/{geoguessrId}")
+                return progress.get("rating")
+            except aiohttp.ClientResponseError as e:
+                if e.status == 429 and attempt < maxRetries:
+                    try:
+                        retryAfter = float((e.headers or {}).get("Retry-After", 2 ** (attempt + 1)))
+                    except ValueError:
+                        retryAfter = 2 ** (attempt + 1)
+                    self._pausedUntil = max(self._pausedUntil, time.monotonic() + retryAfter)
+                    continue
+                if e.status == 404:
+                    return None
+                raise
+        return None
+
+    async def run(self) -> EloRefreshReport:
+        """Runs a refresh (or waits for the one in progress) and returns its report."""
+        if not self.running:
+            self._runTask = asyncio.create_task(self._run())
+        return await asyncio.shield(self._runTask)
+
+    async def _run(self) -> EloRefreshReport:
+        if not await gu.has_column("Inscrits", ELO_HEADER, ss.Priority.BACKGROUND):
+            raise KeyError(f"Colonne '{ELO_HEADER}' introuvable dans la feuille Inscrits, ajoutez son en-tête")
+        start = time.perf_counter()
+        registrations = [
+            registration for registration in await self.store.list_registrations() if registration.geoguessrId
+        ]
+        # Les fichiers du point de reprise sont lus et écrits dans un thread, pour ne pas bloquer la boucle
+        startedAt, ratings = await asyncio.to_thread(self._load_checkpoint)
+        resumed = sum(1 for registration in registrations if registration.geoguessrId in ratings)
+        toFetch = list(dict.fromkeys(r.geoguessrId for r in registrations if r.geoguessrId not in ratings))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed = 0
+        sinceCheckpoint = 0
+
+        async def fetch(geoguessrId: str):
+            nonlocal failed, sinceCheckpoint
+            async with semaphore:
+                try:
+                    ratings[geoguessrId] = await self._fetch_rating(geoguessrId)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    failed += 1
+                    print(f"ELO de {geoguessrId} non récupéré : {e!r}")
+                    return
+            sinceCheckpoint += 1
+            if sinceCheckpoint >= self.checkpointEvery:
+                sinceCheckpoint = 0
+                await asyncio.to_thread(self._save_checkpoint, startedAt, dict(ratings))
+
+        try:
+            await asyncio.gather(*(fetch(geoguessrId) for geoguessrId in toFetch))
+        finally:
+            await asyncio.to_thread(self._save_checkpoint, startedAt, dict(ratings))
+        fetchElapsed = time.perf_counter() - start
+
+        # Une seule écriture pour toute la colonne. Les lignes sont retrouvées par ID Discord juste avant
+        # (les organisateurs ont pu trier la feuille), les inscrits pas encore exportés n'en ont pas
+        sheetDiscordIds = await gu.get_column("Inscrits", rm.HEADERS[0], priority=ss.Priority.BACKGROUND)
+        sheetRows = {str(discordId): index + 2 for index, discordId in enumerate(sheetDiscordIds) if str(discordId)}
+        valuesByRow = {
+            sheetRows[registration.discordId]: (
+                "" if ratings[registration.geoguessrId] is None else ratings[registration.geoguessrId]
+            )
+            for registration in registrations
+            if registration.discordId in sheetRows and registration.geoguessrId in ratings
+        }
+        if valuesByRow:
+            await gu.write_column("Inscrits", ELO_HEADER, valuesByRow)
+        if not failed:
+            await asyncio.to_thread(self._remove_checkpoint)
+
+        self.lastReport = EloRefreshReport(
+            len(registrations), len(toFetch) - failed, resumed, failed, len(valuesByRow), fetchElapsed
+        )
+        print(f"Rafraîchissement des ELO : {self.lastReport}")
+        return self.lastReport
+
+    async def run_periodically(self, interval: float = 6 * 3600, log: Optional[dl.DiscordLog] = None):
+        """
+        Background task refreshing the ratings every `interval` seconds.
+
+        A failed run is sent to `log` once (for example the missing "ELO" header): the same error is
+        not sent again at the next runs, until a run succeeds.
+        """
+        reportedError = None
+        while True:
+            try:
+                await self.run()
+                reportedError = None
+            except Exception as e:
+                traceback.print_exc()
+                if log is not None and repr(e) != reportedError:
+                    reportedError = repr(e)
+                    await log.send_log_embed("Rafraîchissement automatique des ELO impossible", dl.LogLevels.ERROR, e)
+            await asyncio.sleep(interval)
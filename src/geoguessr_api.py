@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+
+GEOGUESSR_URL = "https://www.geoguessr.com"
+
+
+class GeoGuessrClient:
+    """
+    HTTP client of the GeoGuessr API, shared by every call of the bot.
+
+    The `aiohttp.ClientSession` is created on the first request and keeps its connections open
+    (keep-alive), so the DNS lookup and the TLS handshake are only done once per connection
+    instead of once per call. It is closed by `HellBot.close`.
+    """
+
+    def __init__(
+        self,
+        baseUrl: str = GEOGUESSR_URL,
+        limitPerHost: int = 10,
+        connectTimeout: float = 5,
+        readTimeout: float = 10,
+        keepAliveTimeout: float = 60,
+    ):
+        """
+        Args:
+            baseUrl (str, optional): Root URL of the API. Defaults to GEOGUESSR_URL.
+            limitPerHost (int, optional): Maximum number of connections opened at the same time. Defaults to 10.
+            connectTimeout (float, optional): Seconds to open a connection. Defaults to 5.
+            readTimeout (float, optional): Seconds to wait for the response data. Defaults to 10.
+            keepAliveTimeout (float, optional): Seconds an idle connection is kept open. Defaults to 60.
+        """
+        self.baseUrl = baseUrl.rstrip("/")
+        self.limitPerHost = limitPerHost
+        self.timeout = aiohttp.ClientTimeout(total=None, connect=connectTimeout, sock_read=readTimeout)
+        self.keepAliveTimeout = keepAliveTimeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limitPerHost, ttl_dns_cache=300, keepalive_timeout=self.keepAliveTimeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def get_json(self, path: str) -> dict:
+        """GET a path of the API and returns the decoded JSON response (raises `aiohttp.ClientResponseError` on error)."""
+        async with self.session.get(self.baseUrl + path) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def get_status(self, path: str) -> int:
+        """GET a path of the API and returns the HTTP status."""
+        async with self.session.get(self.baseUrl + path) as response:
+            # Lire la réponse pour que la connexion retourne dans le pool
+            await response.read()
+            return response.status
+
+    async def is_ok(self, path: str) -> bool:
+        """GET a path of the API and tells if the status is a success."""
+        return 200 <= await self.get_status(path) < 300
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class GeoGuessrIdValidator:
+    """
+    Checks that GeoGuessr IDs exist, with one request per ID.
+
+    Concurrent checks of the same ID share a single request. The answers are cached: an existing
+    ID for `positiveTtl` seconds, an unknown one (404) for `negativeTtl` seconds only, so that a
+    player who just fixed their profile can retry. Other errors (rate limit, server error, timeout)
+    are not cached, and the answer is then None: the ID could not be checked.
+    """
+
+    def __init__(
+        self, client: GeoGuessrClient, positiveTtl: float = 24 * 3600, negativeTtl: float = 300, maxSize: int = 10000
+    ):
+        """
+        Args:
+            client (GeoGuessrClient): The client used for the requests.
+            positiveTtl (float, optional): Seconds an existing ID is cached. Defaults to 24 hours.
+            negativeTtl (float, optional): Seconds an unknown ID is cached. Defaults to 300.
+            maxSize (int, optional): Maximum number of cached IDs, the oldest are dropped first. Defaults to 10000.
+        """
+        self.client = client
+        self.positiveTtl = positiveTtl
+        self.negativeTtl = negativeTtl
+        self.maxSize = maxSize
+        # geoguessrId -> (existe, date d'expiration)
+        self.results: dict[str, tuple[bool, float]] = {}
+        self._checks: dict[str, asyncio.Task] = {}
+        self.requests = 0
+
+    async def _check(self, geoguessrId: str) -> Optional[bool]:
+        self.requests += 1
+        try:
+            status = await self.client.get_status(f"/api/v3/users/{geoguessrId}/stats")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+        if 200 <= status < 300:
+            self._store(geoguessrId, True, self.positiveTtl)
+            return True
+        if status in (400, 404):
+            self._store(geoguessrId, False, self.negativeTtl)
+            return False
+        # Limite de requêtes ou erreur serveur : GeoGuessr ne dit rien de l'ID
+        return None
+
+    def _store(self, geoguessrId: str, exists: bool, ttl: float):
+        self.results.pop(geoguessrId, None)
+        self.results[geoguessrId] = (exists, time.monotonic() + ttl)
+        while len(self.results) > self.maxSize:
+            del self.results[next(iter(self.results))]
+
+    async def is_valid(self, geoguessrId: str) -> Optional[bool]:
+        """
+        Tells if a GeoGuessr ID exists, from the cache or from the API.
+
+        Returns:
+            bool | None: None if GeoGuessr could not be reached or answered with an error (429, 5xx).
+        """
+        cached = self.results.get(geoguessrId)
+        if cached is not None:
+            exists, expiresAt = cached
+            if expiresAt > time.monotonic():
+                return exists
+            del self.results[geoguessrId]
+        task = self._checks.get(geoguessrId)
+        if task is None:
+            task = asyncio.create_task(self._check(geoguessrId))
+            self._checks[geoguessrId] = task
+            task.add_done_callback(lambda _: self._checks.pop(geoguessrId, None))
+        return await asyncio.shield(task)
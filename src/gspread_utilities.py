@@ -1,9 +1,25 @@
+import asyncio
+import functools
 import os
+import time
+import traceback
+from typing import Awaitable, Callable, Optional, TypeVar, Union
 
 import discord
+import gspread
 import gspread_asyncio
 from google.oauth2.service_account import Credentials
 
+import registrations_mirror as rm
+import sheet_write_queue as swq
+import sheets_scheduler as ss
+
+SPREADSHEET_NAME = "[ORGA] Hell Cup S2 Inscriptions"
+# Nombre de rafraîchissements incrémentaux entre deux rechargements complets de "Inscrits"
+INSCRITS_FULL_RESYNC_EVERY = 10
+
+T = TypeVar("T")
+
 
 def get_creds():
     # To obtain a service account JSON file, follow these steps:
@@ -38,6 +54,51 @@ def get_creds():
     return scoped
 
 
+# Un seul client manager pour tout le process : gspread_asyncio garde le client autorisé
+# en mémoire et se ré-authentifie tout seul toutes les `reauth_interval` minutes.
+# Le débit est limité par `scheduler`, le délai propre à gspread_asyncio est donc réduit.
+agcm = gspread_asyncio.AsyncioGspreadClientManager(get_creds, gspread_delay=0.1, reauth_interval=45)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Tells if a failed Google Sheets call is worth retrying (quota exceeded or server error)."""
+    if isinstance(error, gspread.exceptions.APIError):
+        statusCode = error.response.status_code
+        return statusCode == 429 or statusCode >= 500
+    return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
+
+def is_quota_exceeded_error(error: Exception) -> bool:
+    return isinstance(error, gspread.exceptions.APIError) and error.response.status_code == 429
+
+
+# Tous les appels à l'API Google Sheets passent par ce scheduler (quotas lecture / écriture par minute)
+scheduler = ss.SheetsScheduler(
+    readsPerMinute=60, writesPerMinute=60, isRetryable=is_retryable_error, isQuotaExceeded=is_quota_exceeded_error
+)
+
+# Cache des handles (spreadsheet / worksheets), lié au client qui les a ouverts
+_handlesClient: Optional[gspread_asyncio.AsyncioGspreadClient] = None
+_spreadsheetCache: dict[str, gspread_asyncio.AsyncioGspreadSpreadsheet] = {}
+_worksheetCache: dict[tuple[str, str], gspread_asyncio.AsyncioGspreadWorksheet] = {}
+_headersCache: dict[str, list[str]] = {}
+_handlesLock = asyncio.Lock()
+
+# Miroir local de la feuille "Inscrits"
+inscritsMirror = rm.RegistrationsMirror()
+_inscritsMirrorLock = asyncio.Lock()
+_inscritsRefreshCount = 0
+
+# Caches pour /bet : IDs Discord ayant déjà parié et équipes qualifiées
+QUALIFIED_TEAMS_TTL = 300
+_bettorIds: Optional[set[int]] = None
+_qualifiedTeams: Optional[list[str]] = None
+_qualifiedTeamsLoadedAt = 0.0
+_betsCacheLock = asyncio.Lock()
+# Incrémenté par `invalidate_bets_cache`, pour ne pas garder une lecture commencée avant l'invalidation
+_betsCacheGeneration = 0
+
+
 async def connect_gsheet_api() -> gspread_asyncio.AsyncioGspreadClient:
     """
     Connect to the Google Sheets API using the credentials from the "creds.json" file.
@@ -51,11 +112,280 @@ async def connect_gsheet_api() -> gspread_asyncio.AsyncioGspreadClient:
 
     These scopes are required for the gspread_asyncio library to work.
 
+    The client comes from the process-wide client manager, so the credentials are only read
+    and authorized again when the token has to be refreshed.
+
     Returns a gspread_asyncio.AsyncioGspreadClient object.
     """
-    agcm = gspread_asyncio.AsyncioGspreadClientManager(get_creds)
-    clientg = await agcm.authorize()
-    return clientg
+    return await agcm.authorize()
+
+
+def invalidate_handles(worksheetName: Optional[str] = None):
+    """
+    Forget the cached spreadsheet and worksheet handles.
+
+    Args:
+        worksheetName (str, optional): Only forget this worksheet. Defaults to None (forget everything).
+    """
+    if worksheetName is None:
+        _spreadsheetCache.clear()
+        _worksheetCache.clear()
+        _headersCache.clear()
+        return
+    _headersCache.pop(worksheetName, None)
+    for key in [key for key in _worksheetCache if key[1] == worksheetName]:
+        del _worksheetCache[key]
+
+
+async def get_spreadsheet(
+    spreadsheetName: str = SPREADSHEET_NAME, priority: ss.Priority = ss.Priority.INTERACTIVE
+) -> gspread_asyncio.AsyncioGspreadSpreadsheet:
+    """
+    Returns the spreadsheet handle, opening it only if it is not cached yet.
+
+    The cache is dropped when the client manager hands out a new client (token refresh).
+    """
+    global _handlesClient
+    clientg = await connect_gsheet_api()
+    async with _handlesLock:
+        if clientg is not _handlesClient:
+            invalidate_handles()
+            _handlesClient = clientg
+        if spreadsheetName not in _spreadsheetCache:
+            _spreadsheetCache[spreadsheetName] = await scheduler.submit(
+                "read", lambda: clientg.open(spreadsheetName), priority
+            )
+        return _spreadsheetCache[spreadsheetName]
+
+
+async def get_worksheet(
+    worksheetName: str, spreadsheetName: str = SPREADSHEET_NAME, priority: ss.Priority = ss.Priority.INTERACTIVE
+) -> gspread_asyncio.AsyncioGspreadWorksheet:
+    """
+    Returns the worksheet handle, opening it only if it is not cached yet.
+    """
+    spreadsheet = await get_spreadsheet(spreadsheetName, priority)
+    key = (spreadsheetName, worksheetName)
+    async with _handlesLock:
+        if key not in _worksheetCache:
+            _worksheetCache[key] = await scheduler.submit(
+                "read", lambda: spreadsheet.worksheet(worksheetName), priority
+            )
+        return _worksheetCache[key]
+
+
+def is_stale_handle_error(error: Exception) -> bool:
+    """
+    Tells if an error means that a cached handle no longer points to the right sheet.
+
+    That is the case when the sheet was deleted (404) or renamed (the A1 range built from the
+    cached title can no longer be parsed by the API).
+    """
+    if isinstance(error, (gspread.exceptions.WorksheetNotFound, gspread.exceptions.SpreadsheetNotFound)):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        statusCode = error.response.status_code
+        return statusCode == 404 or (statusCode == 400 and "Unable to parse range" in str(error))
+    return False
+
+
+def is_out_of_grid_error(error: Exception) -> bool:
+    """Tells if an error means that the requested range starts after the last row of the sheet grid."""
+    return (
+        isinstance(error, gspread.exceptions.APIError)
+        and error.response.status_code == 400
+        and "exceeds grid limits" in str(error)
+    )
+
+
+async def run_on_worksheet(
+    worksheetName: str,
+    operation: Callable[[gspread_asyncio.AsyncioGspreadWorksheet], Awaitable[T]],
+    kind: str = "read",
+    priority: ss.Priority = ss.Priority.INTERACTIVE,
+) -> T:
+    """
+    Runs an operation on a cached worksheet handle, through the quota scheduler.
+
+    If the handle turns out to be stale (sheet renamed or deleted), the cache is invalidated and the
+    operation is retried once on a freshly opened handle.
+
+    Args:
+        worksheetName (str): The name of the worksheet in the tournament spreadsheet.
+        operation (Callable): A coroutine function receiving the worksheet.
+        kind (str, optional): "read" or "write", the quota the operation counts against. Defaults to "read".
+        priority (Priority, optional): Priority of the call. Defaults to Priority.INTERACTIVE.
+
+    Returns:
+        The result of the operation.
+    """
+    worksheet = await get_worksheet(worksheetName, priority=priority)
+    try:
+        return await scheduler.submit(kind, lambda: operation(worksheet), priority)
+    except gspread.exceptions.GSpreadException as e:
+        if not is_stale_handle_error(e):
+            raise
+        invalidate_handles()
+        worksheet = await get_worksheet(worksheetName, priority=priority)
+        return await scheduler.submit(kind, lambda: operation(worksheet), priority)
+
+
+async def get_headers(worksheetName: str, priority: ss.Priority = ss.Priority.INTERACTIVE) -> list[str]:
+    """
+    Returns the header row of a worksheet, read once and then cached with the handles.
+    """
+    if worksheetName not in _headersCache:
+        _headersCache[worksheetName] = await run_on_worksheet(
+            worksheetName, lambda worksheet: worksheet.row_values(1), priority=priority
+        )
+    return _headersCache[worksheetName]
+
+
+async def has_column(worksheetName: str, header: str, priority: ss.Priority = ss.Priority.INTERACTIVE) -> bool:
+    """
+    Tells if a worksheet has a column with this header, reading the header row again if it is not cached.
+    """
+    if header in await get_headers(worksheetName, priority):
+        return True
+    _headersCache.pop(worksheetName, None)
+    return header in await get_headers(worksheetName, priority)
+
+
+async def write_column(
+    worksheetName: str, header: str, valuesByRow: dict[int, object], priority: ss.Priority = ss.Priority.BACKGROUND
+):
+    """
+    Writes values in the column with this header, in a single `batch_update` call.
+
+    The column must already exist: it is never added after the last header, because `row_values`
+    trims the empty headers (such as the team flag of "Inscrits", column D) and the new column
+    would overwrite one of them.
+
+    Args:
+        worksheetName (str): The name of the worksheet.
+        header (str): The header of the column.
+        valuesByRow (dict[int, object]): The value to write in each sheet row.
+        priority (Priority, optional): Priority of the Google Sheets calls. Defaults to Priority.BACKGROUND.
+    """
+    if not await has_column(worksheetName, header, priority):
+        raise KeyError(f"Colonne '{header}' introuvable dans la feuille {worksheetName}")
+    column = (await get_headers(worksheetName, priority)).index(header) + 1
+    updates = [
+        {"range": gspread.utils.rowcol_to_a1(row, column), "values": [[value]]} for row, value in sorted(valuesByRow.items())
+    ]
+    await run_on_worksheet(worksheetName, lambda worksheet: worksheet.batch_update(updates), "write", priority)
+
+
+async def get_columns(
+    worksheetName: str,
+    headers: list[Union[str, int]],
+    firstRow: int = 2,
+    priority: ss.Priority = ss.Priority.INTERACTIVE,
+) -> list[tuple]:
+    """
+    Reads only some columns of a worksheet, in a single `batch_get` call.
+
+    Args:
+        worksheetName (str): The name of the worksheet.
+        headers (list[str | int]): The headers of the columns to read, or their number (1 for A) for
+            the columns without a fixed header.
+        firstRow (int, optional): The first sheet row to read. Defaults to 2 (just after the header).
+        priority (Priority, optional): Priority of the Google Sheets calls. Defaults to Priority.INTERACTIVE.
+
+    Returns:
+        list[tuple]: One tuple per row, with the values in the order of `headers` ("" for empty cells).
+    """
+    sheetHeaders = await get_headers(worksheetName, priority)
+    if any(isinstance(header, str) and header not in sheetHeaders for header in headers):
+        # Colonnes renommées ou déplacées par les organisateurs : on relit l'en-tête une fois
+        _headersCache.pop(worksheetName, None)
+        sheetHeaders = await get_headers(worksheetName, priority)
+    letters = []
+    for header in headers:
+        if isinstance(header, int):
+            # Colonne prise par position : son en-tête peut être vide (et absent de `row_values`)
+            letters.append(gspread.utils.rowcol_to_a1(1, header)[:-1])
+            continue
+        if header not in sheetHeaders:
+            raise KeyError(f"Colonne '{header}' introuvable dans la feuille {worksheetName}")
+        letters.append(gspread.utils.rowcol_to_a1(1, sheetHeaders.index(header) + 1)[:-1])
+    ranges = [f"{letter}{firstRow}:{letter}" for letter in letters]
+    valueRanges = await run_on_worksheet(
+        worksheetName, lambda worksheet: worksheet.batch_get(ranges, major_dimension="COLUMNS"), priority=priority
+    )
+    columns = [valueRange[0] if valueRange else [] for valueRange in valueRanges]
+    rowCount = max((len(column) for column in columns), default=0)
+    return [
+        tuple(column[index] if index < len(column) else "" for column in columns) for index in range(rowCount)
+    ]
+
+
+async def get_column(
+    worksheetName: str, header: str, firstRow: int = 2, priority: ss.Priority = ss.Priority.INTERACTIVE
+) -> list:
+    """
+    Reads a single column of a worksheet, see `get_columns`.
+    """
+    return [row[0] for row in await get_columns(worksheetName, [header], firstRow, priority)]
+
+
+# File d'écriture groupée devant toutes les écritures dans le Google Sheet
+writeQueue = swq.SheetWriteQueue(functools.partial(run_on_worksheet, kind="write"))
+
+
+async def warm_up():
+    """
+    Authorizes the client and opens the tournament spreadsheet once at startup,
+    so the first registration does not pay for it.
+
+    The writes left in the journal by a previous run are sent again.
+    """
+    await get_spreadsheet()
+    await writeQueue.flush()
+
+
+async def refresh_inscrits_mirror(full: bool = False, priority: ss.Priority = ss.Priority.INTERACTIVE):
+    """
+    Brings the local mirror of the "Inscrits" worksheet up to date.
+
+    Only the rows after the last known row are downloaded, except on the first call, when
+    `full` is True, or every `INSCRITS_FULL_RESYNC_EVERY` calls so that edits made by the
+    organizers in existing rows are picked up as well.
+
+    Args:
+        full (bool, optional): Reload the whole sheet. Defaults to False.
+        priority (Priority, optional): Priority of the Google Sheets calls. Defaults to Priority.INTERACTIVE.
+    """
+    global _inscritsRefreshCount
+    async with _inscritsMirrorLock:
+        _inscritsRefreshCount += 1
+        projection = list(rm.HEADERS) + [rm.TEAM_FLAG_COLUMN]
+        if full or not inscritsMirror.loaded or _inscritsRefreshCount % INSCRITS_FULL_RESYNC_EVERY == 0:
+            values = await get_columns("Inscrits", projection, priority=priority)
+            inscritsMirror.clear()
+            inscritsMirror.load(values)
+        else:
+            firstRow = inscritsMirror.lastRow + 1
+            try:
+                values = await get_columns("Inscrits", projection, firstRow, priority)
+            except gspread.exceptions.APIError as e:
+                # La grille s'arrête à la dernière ligne remplie : pas de nouvelle ligne
+                if not is_out_of_grid_error(e):
+                    raise
+                values = []
+            inscritsMirror.load(values, firstRow)
+
+
+async def inscrits_mirror_refresh_loop(interval: float = 60):
+    """
+    Background task refreshing the "Inscrits" mirror every `interval` seconds.
+    """
+    while True:
+        try:
+            await refresh_inscrits_mirror(priority=ss.Priority.BACKGROUND)
+        except Exception:
+            traceback.print_exc()
+        await asyncio.sleep(interval)
 
 
 async def gspread_new_registration(member: dict):
@@ -73,10 +403,10 @@ async def gspread_new_registration(member: dict):
 
     Returns nothing.
     """
-    clientg = await connect_gsheet_api()
-    spreadsheet = await clientg.open("[ORGA] Hell Cup S2 Inscriptions")
-    worksheet = await spreadsheet.worksheet("Inscrits")
-    await worksheet.append_row([member["discordId"], member["geoguessrId"], member["surname"], 0])
+    row = [member["discordId"], member["geoguessrId"], member["surname"], 0]
+    rowNumber = await writeQueue.append("Inscrits", row)
+    if rowNumber is not None and inscritsMirror.loaded:
+        inscritsMirror.add_row(rowNumber, row)
     return
 
 
@@ -107,65 +437,133 @@ async def gspread_new_team(
     :return: A list containing the surmames of the two members of the team
     :rtype: List[str]
     """
-    clientg = await connect_gsheet_api()
-    spreadsheet = await clientg.open("[ORGA] Hell Cup S2 Inscriptions")
-    worksheet = await spreadsheet.worksheet("Inscrits")
-    lines = await worksheet.get_all_records()
-    player1Updated = player2Updated = False
-    team = {"member1_discordId": str(member1.id), "member2_discordId": str(member2.id)}
-    for lineNumber, line in enumerate(lines):
-        if str(line["ID Discord"]) == team["member1_discordId"]:
-            await worksheet.update_cell(lineNumber + 2, 4, 1)
-            team["member1_geoguessrId"] = line["ID GeoGuessr"]
-            team["member1_surname"] = line["Pseudo/surnom"]
-            player1Updated = True
-        if str(line["ID Discord"]) == team["member2_discordId"]:
-            await worksheet.update_cell(lineNumber + 2, 4, 1)
-            team["member2_geoguessrId"] = line["ID GeoGuessr"]
-            team["member2_surname"] = line["Pseudo/surnom"]
-            player2Updated = True
-        if player1Updated and player2Updated:
-            break
-    worksheet = await spreadsheet.worksheet("Teams")
+    if not inscritsMirror.loaded:
+        await refresh_inscrits_mirror()
+    player1 = inscritsMirror.get_by_discord_id(member1.id)
+    player2 = inscritsMirror.get_by_discord_id(member2.id)
+    if player1 is None or player2 is None:
+        # Inscription faite depuis une autre instance ou ajoutée à la main : on va chercher les nouvelles lignes
+        await refresh_inscrits_mirror()
+        player1 = inscritsMirror.get_by_discord_id(member1.id)
+        player2 = inscritsMirror.get_by_discord_id(member2.id)
+    if player1 is None or player2 is None:
+        missing = member1 if player1 is None else member2
+        raise KeyError(f"{missing.name} ({missing.id}) n'est pas dans la feuille Inscrits")
+
+    # Une seule requête pour marquer les deux joueurs (colonne D)
+    await writeQueue.update(
+        "Inscrits",
+        [
+            {"range": f"D{player1.row}", "values": [[1]]},
+            {"range": f"D{player2.row}", "values": [[1]]},
+        ],
+    )
+    inscritsMirror.mark_team(member1.id)
+    inscritsMirror.mark_team(member2.id)
     outputDict = {
-        "member1_discordId": team["member1_discordId"],
-        "member1_geoguessrId": team["member1_geoguessrId"],
-        "member2_discordId": team["member2_discordId"],
-        "member2_geoguessrId": team["member2_geoguessrId"],
-        "member1_surname": team["member1_surname"],
-        "member2_surname": team["member2_surname"],
-        "team_name": team["member1_surname"] + "_" + team["member2_surname"],
+        "member1_discordId": player1.discordId,
+        "member1_geoguessrId": player1.geoguessrId,
+        "member2_discordId": player2.discordId,
+        "member2_geoguessrId": player2.geoguessrId,
+        "member1_surname": player1.surname,
+        "member2_surname": player2.surname,
+        "team_name": player1.surname + "_" + player2.surname,
         "firstMode": firstMode,
         "secondMode": secondMode,
         "thirdMode": thirdMode,
     }
 
-    await worksheet.append_row(list(outputDict.values()))
+    await writeQueue.append("Teams", list(outputDict.values()))
 
     return outputDict
 
 
+def invalidate_bets_cache():
+    """
+    Forgets the cached bettors and qualified teams, they are reloaded from the sheet on the next `/bet`.
+
+    To be called when the organizers edit the "Bets" or "Qualifiés" worksheets by hand.
+    """
+    global _bettorIds, _qualifiedTeams, _betsCacheGeneration
+    _bettorIds = None
+    _qualifiedTeams = None
+    _betsCacheGeneration += 1
+
+
+async def _load_bets_cache() -> tuple[set[int], list[str]]:
+    """
+    Returns the bettors and the qualified teams, reading from the sheet only what is missing or stale.
+
+    Both values are read into locals and stored together once every read is done, so a concurrent
+    `invalidate_bets_cache` can not leave one of them None while it is being used.
+    """
+    global _bettorIds, _qualifiedTeams, _qualifiedTeamsLoadedAt
+    async with _betsCacheLock:
+        generation = _betsCacheGeneration
+        bettorIds, qualifiedTeams, loadedAt = _bettorIds, _qualifiedTeams, _qualifiedTeamsLoadedAt
+        if bettorIds is None:
+            bettorIds = {int(discordId) for discordId in await get_column("Bets", "DiscordId") if discordId != ""}
+        if qualifiedTeams is None or time.monotonic() - loadedAt > QUALIFIED_TEAMS_TTL:
+            qualifiedTeams = [name for name in await get_column("Qualifiés", "Nom d'équipe") if name != ""]
+            loadedAt = time.monotonic()
+        if generation == _betsCacheGeneration:
+            _bettorIds, _qualifiedTeams, _qualifiedTeamsLoadedAt = bettorIds, qualifiedTeams, loadedAt
+        return bettorIds, qualifiedTeams
+
+
+async def get_registration(discordId) -> Optional[rm.Registration]:
+    """
+    Looks a registered player up in the "Inscrits" mirror.
+
+    Returns None if the player is not registered.
+    """
+    if not inscritsMirror.loaded:
+        await refresh_inscrits_mirror()
+    return inscritsMirror.get_by_discord_id(discordId)
+
+
+def _bets_cache_is_stale() -> bool:
+    return _bettorIds is None or _qualifiedTeams is None or time.monotonic() - _qualifiedTeamsLoadedAt > QUALIFIED_TEAMS_TTL
+
+
+async def has_bet(discordId: int) -> bool:
+    """
+    Tells if the given Discord ID has already placed a bet.
+    """
+    if _bets_cache_is_stale():
+        bettorIds, _ = await _load_bets_cache()
+    else:
+        bettorIds = _bettorIds
+    return discordId in bettorIds
+
+
+async def get_qualified_teams_names() -> list[str]:
+    """
+    Returns a copy of the cached list of qualified teams names.
+    """
+    if _bets_cache_is_stale():
+        _, qualifiedTeams = await _load_bets_cache()
+    else:
+        qualifiedTeams = _qualifiedTeams
+    return list(qualifiedTeams)
+
+
 async def get_qualified_teams_names_if_id_is_able_to_bet(discordId: int):
     """
     Récupère la liste des noms des équipes qualifiées pour la Hellcup.
 
+    Les parieurs et les équipes qualifiées sont gardés en mémoire : la feuille n'est relue qu'au
+    premier appel, après `QUALIFIED_TEAMS_TTL` secondes pour les équipes, ou après `invalidate_bets_cache`.
+
     Returns:
-        list: Une liste contenant les noms des équipes qualifiées.
+        list: Une liste contenant les noms des équipes qualifiées, vide si l'utilisateur a déjà parié.
     """
-    clientg = await connect_gsheet_api()
-    spreadsheet = await clientg.open("[ORGA] Hell Cup S2 Inscriptions")
-    worksheetBets = await spreadsheet.worksheet("Bets")
-    data = await worksheetBets.get_all_records()
-    betDiscordIds = [int(bet["DiscordId"]) for bet in data]
-    if discordId in betDiscordIds:
+    if await has_bet(discordId):
         return []
-    worksheetQualified = await spreadsheet.worksheet("Qualifiés")
-    data = await worksheetQualified.get_all_records()
-    qualifiedTeamsNames = [team["Nom d'équipe"] for team in data]
-    return qualifiedTeamsNames
+    return await get_qualified_teams_names()
 
 
-async def place_bet(discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous: bool, discordName: str):
+async def place_bet(discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous: bool, discordName: str) -> bool:
     """
     Place a bet for the Hellcup.
 
@@ -178,9 +576,16 @@ async def place_bet(discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous
         discordName (str): The name of the player on Discord.
 
     Returns:
-        None
+        bool: False if this Discord ID has already placed a bet (nothing is written), True otherwise.
     """
-    clientg = await connect_gsheet_api()
-    spreadsheet = await clientg.open("[ORGA] Hell Cup S2 Inscriptions")
-    worksheet = await spreadsheet.worksheet("Bets")
-    await worksheet.append_row([str(discordId), bet1, bet2, bet3, isAnonymous, discordName])
+    bettorIds = (await _load_bets_cache())[0] if _bets_cache_is_stale() else _bettorIds
+    # Pas d'attente entre la vérification et l'ajout : deux paris simultanés ne passent pas tous les deux
+    if discordId in bettorIds:
+        return False
+    bettorIds.add(discordId)
+    try:
+        await writeQueue.append("Bets", [str(discordId), bet1, bet2, bet3, isAnonymous, discordName])
+    except Exception:
+        bettorIds.discard(discordId)
+        raise
+    return True
@@ -1,21 +1,33 @@
-import aiohttp
+import asyncio
+from typing import Optional
+
 import discord
 
 from easyDB import DB
-import gspread_utilities as gu
-
-async def is_geoguessr_id_correct(geoguessrId: str):
+import geoguessr_api as gg
+import player_profiles as pp
+import storage as st
+
+# Stockage des données du tournoi, créé par bot.py au démarrage avec `storage.create_storage`
+storage: Optional[st.StorageBackend] = None
+# Client HTTP partagé de l'API GeoGuessr, fermé par `HellBot.close`
+geoguessr = gg.GeoGuessrClient()
+# Vérification des ID GeoGuessr à l'inscription : une seule requête par ID, réponses gardées en cache
+geoguessrIdValidator = gg.GeoGuessrIdValidator(geoguessr)
+# Requêtes qui forment les données d'un joueur, fusionnées dans cet ordre
+PLAYER_ENDPOINTS = ("/api/v4/ranked-system/progress/{}", "/api/v3/users/{}")
+
+async def is_geoguessr_id_correct(geoguessrId: str) -> Optional[bool]:
     """
-    Checks if the given Geoguessr ID is correct.
+    Checks if the given Geoguessr ID is correct (concurrent checks of the same ID share one request,
+    and the answers are cached, see `geoguessr_api.GeoGuessrIdValidator`).
 
     :param geoguessr_id: The Geoguessr ID to check
     :type geoguessr_id: str
-    :return: True if the Geoguessr ID is correct, False otherwise
-    :rtype: bool
+    :return: True if the Geoguessr ID is correct, False otherwise, None if GeoGuessr is unavailable
+    :rtype: Optional[bool]
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"https://www.geoguessr.com/api/v3/users/{geoguessrId}/stats") as response:
-            return response.ok
+    return await geoguessrIdValidator.is_valid(geoguessrId)
 
 
 async def inscription(member: dict):
@@ -33,7 +45,7 @@ async def inscription(member: dict):
 
     Returns nothing.
     """
-    await gu.gspread_new_registration(member)
+    await storage.add_registration(member)
     return
 
 
@@ -69,7 +81,7 @@ async def create_team(member1: discord.Member, member2: discord.Member, firstMod
     :return: A dictionary containing the surmames of the two members of the team
     :rtype: dict[str, str]
     """
-    return await gu.gspread_new_team(member1, member2, firstMode, secondMode, thirdMode)
+    return await storage.create_team(member1, member2, firstMode, secondMode, thirdMode)
 
 
 async def get_qualified_teams_names_if_id_is_able_to_bet(discordId: int):
@@ -80,10 +92,12 @@ async def get_qualified_teams_names_if_id_is_able_to_bet(discordId: int):
 
     :rtype: List[str]
     """
-    return await gu.get_qualified_teams_names_if_id_is_able_to_bet(discordId)
+    if await storage.has_bet(discordId):
+        return []
+    return await storage.get_qualified_teams_names()
 
 
-async def place_bet(discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous: bool, discordName: str):
+async def place_bet(discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous: bool, discordName: str) -> bool:
     """
     Places a bet for the Hellcup.
 
@@ -96,13 +110,13 @@ async def place_bet(discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous
         discordName (str): The name of the player on Discord.
 
     Returns:
-        None
+        bool: False if the player has already placed a bet, in which case nothing is recorded.
     """
-    await gu.place_bet(discordId, bet1, bet2, bet3, isAnonymous, discordName)
+    return await storage.place_bet(discordId, bet1, bet2, bet3, isAnonymous, discordName)
 
 async def get_player_datas(geoguessrId: str) -> dict:
     """
-    Retrieves data about a player from the GeoGuessr API.
+    Retrieves data about a player, from the profiles cache or the GeoGuessr API.
 
     Args:
         geoguessrId (str): The GeoGuessr ID of the player.
@@ -110,9 +124,59 @@ async def get_player_datas(geoguessrId: str) -> dict:
     Returns:
         dict: A dictionary containing the player's data.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"https://www.geoguessr.com/api/v4/ranked-system/progress/{geoguessrId}") as r:
-            tempRes = await r.json()
-        async with session.get(f"https://www.geoguessr.com/api/v3/users/{geoguessrId}") as r:
-            tempRes.update(await r.json())
-        return tempRes
+    return await playerProfiles.get(geoguessrId)
+
+
+async def fetch_player_datas(geoguessrId: str) -> dict:
+    """
+    Retrieves data about a player from the GeoGuessr API, without the cache.
+
+    The endpoints are requested at the same time. If some of them fail, the data of the others is
+    returned as a `PartialProfile` (the missing fields are shown as "N/A" and the profile is
+    requested again soon).
+
+    Args:
+        geoguessrId (str): The GeoGuessr ID of the player.
+
+    Returns:
+        dict: A dictionary containing the player's data.
+
+    Raises:
+        Exception: The error of the first endpoint, if every endpoint failed.
+    """
+    results = await asyncio.gather(
+        *(geoguessr.get_json(endpoint.format(geoguessrId)) for endpoint in PLAYER_ENDPOINTS), return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0]
+    tempRes = pp.PartialProfile() if errors else {}
+    for endpoint, result in zip(PLAYER_ENDPOINTS, results):
+        if isinstance(result, BaseException):
+            print(f"Profil GeoGuessr {geoguessrId} incomplet, échec de {endpoint} : {result!r}")
+        else:
+            tempRes.update(result)
+    return tempRes
+
+
+async def get_players_datas_within(geoguessrIds: list[str], budget: float) -> list[dict]:
+    """
+    Retrieves data about several players at once, in at most `budget` seconds.
+
+    The profiles found in the cache are returned right away, the others are fetched at the same
+    time through the profiles cache (one request in flight per player, see
+    `PlayerProfileCache.get_within`). A player not received in time gets an empty dict, and their
+    request finishes in the background to fill the cache.
+
+    Args:
+        geoguessrIds (list[str]): The GeoGuessr IDs of the players.
+        budget (float): Maximum number of seconds to wait.
+
+    Returns:
+        list[dict]: The (possibly empty) data of each player, in the order of `geoguessrIds`.
+    """
+    return await playerProfiles.get_within(geoguessrIds, budget)
+
+
+# Profils GeoGuessr des joueurs (cartes d'équipe), gardés 1 h puis rafraîchis en arrière-plan
+playerProfiles = pp.PlayerProfileCache(fetch_player_datas)
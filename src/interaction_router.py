@@ -0,0 +1,88 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import discord
+
+import discord_logs as dl
+
+# custom_id générés par discord.py pour les composants des vues (os.urandom(16).hex())
+_GENERATED_CUSTOM_ID = re.compile(r"[0-9a-f]{32}")
+
+Handler = Callable[[discord.Interaction, Any], Awaitable[None]]
+Parser = Callable[[str], Any]
+
+
+@dataclass
+class _Route:
+    handler: Handler
+    parse: Optional[Parser]
+
+
+class CustomIdRouter:
+    """
+    Dispatches the component interactions (buttons, selects) from their custom_id.
+
+    A custom_id is `<prefix>` or `<prefix>.<data>`: the prefix selects the handler in a dictionary,
+    and the data is parsed once by the parser registered with it, into the payload given to the
+    handler. The components of the discord.py views are left to their view, and the unknown
+    custom_ids are reported to the logs.
+    """
+
+    def __init__(self, client: discord.Client, log: dl.DiscordLog):
+        self.client = client
+        self.log = log
+        self.routes: dict[str, _Route] = {}
+
+    def route(self, prefix: str, parse: Optional[Parser] = None):
+        """
+        Decorator registering the handler of a custom_id prefix.
+
+        Args:
+            prefix (str): The part of the custom_id before the first ".".
+            parse (Callable[[str], Any], optional): Turns the data after the prefix into the payload
+                given to the handler. Defaults to None (the handler gets the raw data).
+        """
+
+        def decorator(handler: Handler) -> Handler:
+            if prefix in self.routes:
+                raise ValueError(f"custom_id prefix already registered: {prefix}")
+            self.routes[prefix] = _Route(handler, parse)
+            return handler
+
+        return decorator
+
+    def _owned_by_view(self, customId: str) -> bool:
+        if _GENERATED_CUSTOM_ID.fullmatch(customId):
+            return True
+        return any(
+            getattr(item, "custom_id", None) == customId for view in self.client.persistent_views for item in view.children
+        )
+
+    async def dispatch(self, interaction: discord.Interaction) -> bool:
+        """
+        Runs the handler of a component interaction.
+
+        Returns:
+            bool: True if a handler was found.
+        """
+        if interaction.type != discord.InteractionType.component:
+            return False
+        customId = interaction.data.get("custom_id", "")
+        prefix, _, data = customId.partition(".")
+        route = self.routes.get(prefix)
+        if route is None:
+            if not self._owned_by_view(customId):
+                await self.log.send_log_embed(
+                    f"Interaction inconnue de {interaction.user} ({interaction.user.id})", dl.LogLevels.WARNING, customId
+                )
+            return False
+        try:
+            payload = route.parse(data) if route.parse else data
+        except (ValueError, IndexError) as e:
+            await self.log.send_log_embed(
+                f"custom_id invalide de {interaction.user} ({interaction.user.id}) : {customId}", dl.LogLevels.WARNING, e
+            )
+            return False
+        await route.handler(interaction, payload)
+        return True
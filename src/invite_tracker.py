@@ -0,0 +1,207 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import discord
+
+
+@dataclass
+class UsedInvite:
+    """The invite a member joined with."""
+
+    code: str
+    inviter: Optional[discord.abc.User]
+    uses: int
+    maxUses: int
+
+
+@dataclass
+class AmbiguousJoin:
+    """Several members joined with different invites in the same burst: who used which one is unknown."""
+
+    codes: list[str]
+    joins: int
+    uses: int
+
+
+class _GuildInvites:
+    def __init__(self):
+        self.invites: dict[str, discord.Invite] = {}
+        self.uses: dict[str, int] = {}
+        # Invitations supprimées récemment (invitation, dernières utilisations connues, date) : celles
+        # arrivées à leur nombre max d'utilisations sont supprimées par Discord juste avant l'arrivée
+        # du membre qui les a utilisées
+        self.recentlyDeleted: dict[str, tuple[discord.Invite, int, float]] = {}
+        self.pendingJoins: list[tuple[discord.Member, asyncio.Future]] = []
+        self.fetchTask: Optional[asyncio.Task] = None
+        # Chargement initial des invitations : fait une seule fois, sauf si la liste est marquée périmée
+        self.loadTask: Optional[asyncio.Task] = None
+        self.loaded = False
+        self.stale = False
+
+
+class InviteTracker:
+    """
+    Keeps the use count of every invite in memory to find which invite a new member used.
+
+    Invite creations and deletions are applied from the gateway events, without refetching the
+    list. The joins that arrive within `joinWindow` seconds share a single `guild.invites()` call
+    and are matched to the invites whose use count went up. A join is only attributed when it can
+    not be anything else: as many new uses as joins, all of the same invite. Otherwise the joins
+    are reported as ambiguous.
+
+    The invites of every guild are loaded once per process by `warm_up`, in the background. Joins
+    that arrive before the list of their guild is loaded wait for it before being attributed.
+    """
+
+    def __init__(self, joinWindow: float = 1.5, deletedInviteTtl: float = 30, warmUpConcurrency: int = 4):
+        """
+        Args:
+            joinWindow (float, optional): Seconds to wait for other joins before fetching the invites. Defaults to 1.5.
+            deletedInviteTtl (float, optional): Seconds a deleted invite can still be attributed to a join. Defaults to 30.
+            warmUpConcurrency (int, optional): Maximum number of guilds loaded at the same time. Defaults to 4.
+        """
+        self.joinWindow = joinWindow
+        self.deletedInviteTtl = deletedInviteTtl
+        self.warmUpConcurrency = warmUpConcurrency
+        self.guilds: dict[int, _GuildInvites] = {}
+        self._warmUpSemaphore: Optional[asyncio.Semaphore] = None
+
+    def _guild(self, guildId: int) -> _GuildInvites:
+        return self.guilds.setdefault(guildId, _GuildInvites())
+
+    def set_invites(self, guildId: int, invites: list[discord.Invite]):
+        """Replaces the known invites of a guild with a fresh list."""
+        state = self._guild(guildId)
+        state.invites = {invite.code: invite for invite in invites}
+        state.uses = {invite.code: invite.uses or 0 for invite in invites}
+        state.loaded = True
+        state.stale = False
+
+    def mark_stale(self, guildId: Optional[int] = None):
+        """
+        Marks the invites of a guild (or of every guild) to be loaded again by the next `warm_up`.
+
+        To be called when invite events may have been missed, for example after a new gateway session.
+        """
+        for stateGuildId, state in self.guilds.items():
+            if guildId is None or stateGuildId == guildId:
+                state.stale = True
+
+    async def load(self, guild: discord.Guild):
+        """Fetches the invites of a guild."""
+        if self._warmUpSemaphore is None:
+            self._warmUpSemaphore = asyncio.Semaphore(self.warmUpConcurrency)
+        async with self._warmUpSemaphore:
+            invites = await guild.invites()
+        self.set_invites(guild.id, invites)
+
+    def _ensure_loaded(self, guild: discord.Guild) -> asyncio.Task:
+        state = self._guild(guild.id)
+        if state.loadTask is None or (state.loadTask.done() and (state.stale or not state.loaded)):
+            state.loadTask = asyncio.create_task(self.load(guild))
+        return state.loadTask
+
+    async def warm_up(self, guilds: list[discord.Guild]):
+        """
+        Loads the invites of the guilds not loaded yet (or marked stale), `warmUpConcurrency` at a time.
+
+        Calling it again, for example on every `on_ready`, does not fetch the guilds already loaded.
+        """
+        tasks = [self._ensure_loaded(guild) for guild in guilds]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for guild, result in zip(guilds, results):
+            if isinstance(result, Exception):
+                print(f"Impossible de charger les invitations de {guild.name} : {result!r}")
+
+    def on_invite_create(self, invite: discord.Invite):
+        state = self._guild(invite.guild.id)
+        state.invites[invite.code] = invite
+        state.uses[invite.code] = invite.uses or 0
+
+    def on_invite_delete(self, invite: discord.Invite):
+        state = self._guild(invite.guild.id)
+        knownInvite = state.invites.pop(invite.code, None)
+        lastUses = state.uses.pop(invite.code, 0)
+        if knownInvite is not None:
+            state.recentlyDeleted[invite.code] = (knownInvite, lastUses, time.monotonic())
+
+    async def attribute_join(self, member: discord.Member) -> Union[UsedInvite, AmbiguousJoin, None]:
+        """
+        Finds the invite used by a member who just joined.
+
+        Returns:
+            UsedInvite | AmbiguousJoin | None: The invite, the candidate invites if several members
+            joined with different invites at the same time, or None if it could not be found.
+        """
+        state = self._guild(member.guild.id)
+        future = asyncio.get_running_loop().create_future()
+        state.pendingJoins.append((member, future))
+        if state.fetchTask is None or state.fetchTask.done():
+            state.fetchTask = asyncio.create_task(self._resolve_joins(member.guild, state))
+        return await future
+
+    async def _resolve_joins(self, guild: discord.Guild, state: _GuildInvites):
+        # Les arrivées survenues pendant la récupération des invitations sont traitées au tour suivant
+        while state.pendingJoins:
+            await asyncio.sleep(self.joinWindow)
+            # Attendre la liste de référence si le chargement initial n'est pas terminé
+            try:
+                await asyncio.shield(self._ensure_loaded(guild))
+            except discord.HTTPException:
+                pass
+            joins, state.pendingJoins = state.pendingJoins, []
+            try:
+                invites = await guild.invites()
+            except discord.HTTPException as e:
+                for _, future in joins:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self._attribute(guild.id, state, invites, joins)
+
+    def _attribute(
+        self,
+        guildId: int,
+        state: _GuildInvites,
+        invites: list[discord.Invite],
+        joins: list[tuple[discord.Member, asyncio.Future]],
+    ):
+        if not state.loaded:
+            # Pas de liste de référence : on ne peut rien attribuer, celle-ci servira aux prochaines arrivées
+            self.set_invites(guildId, invites)
+            for _, future in joins:
+                if not future.done():
+                    future.set_result(None)
+            return
+
+        # Nombre d'utilisations nouvelles par invitation
+        newUses: dict[str, tuple[UsedInvite, int]] = {}
+        for invite in invites:
+            uses = invite.uses or 0
+            if uses > state.uses.get(invite.code, 0):
+                newUses[invite.code] = (
+                    UsedInvite(invite.code, invite.inviter, uses, invite.max_uses or 0),
+                    uses - state.uses.get(invite.code, 0),
+                )
+        now = time.monotonic()
+        for code, (invite, lastUses, deletedAt) in state.recentlyDeleted.items():
+            # Seule une invitation à qui il manquait une utilisation a pu être supprimée par Discord
+            # à l'arrivée d'un membre, les autres ont été supprimées à la main ou ont expiré
+            if now - deletedAt <= self.deletedInviteTtl and invite.max_uses and lastUses == invite.max_uses - 1:
+                newUses[code] = (UsedInvite(code, invite.inviter, invite.max_uses, invite.max_uses), 1)
+        state.recentlyDeleted.clear()
+        self.set_invites(guildId, invites)
+
+        usesCount = sum(count for _, count in newUses.values())
+        if not newUses:
+            result = None
+        elif len(newUses) == 1 and usesCount == len(joins):
+            # Toutes les arrivées viennent de la même invitation : l'attribution est certaine
+            result = next(iter(newUses.values()))[0]
+        else:
+            result = AmbiguousJoin(sorted(newUses), len(joins), usesCount)
+        for _, future in joins:
+            if not future.done():
+                future.set_result(result)
@@ -1,12 +1,17 @@
+import time
 import traceback
+from typing import Optional
 
 import discord
-from easyDB import DB
 
+import config as cfg
 import discord_logs as dl
 import hellcup as hc
+import roles as rl
 
 MODE_EMOJIS = {"Move": "🚶‍♂️", "No move": "📍", "NMPZ": "🖼️"}
+# Temps maximum (en secondes) pour récupérer les profils GeoGuessr d'une carte d'équipe
+TEAM_CARD_BUDGET = 3.0
 
 class ErrorLayoutView(discord.ui.LayoutView):
     def __init__(self, errorMessage: str):
@@ -32,13 +37,13 @@ class LoadingLayoutView(discord.ui.LayoutView):
         self.add_item(container)
 
 class TeamInscriptionLayoutView(discord.ui.LayoutView):
-    def __init__(self, interaction: discord.Interaction, log: dl.DiscordLog, database: DB):
+    def __init__(self, interaction: discord.Interaction, log: dl.DiscordLog, config: cfg.BotConfig):
         super().__init__(timeout=None)
         self.interaction = interaction
         self.firstPlayer = interaction.user
         self.secondPlayer: discord.Member = None
         self.log = log
-        self.database = database
+        self.config = config
 
         self.firstContainer = discord.ui.Container(accent_color=discord.Color.green())
         self.secondContainer = discord.ui.Container(accent_color=discord.Color.red())
@@ -68,18 +73,20 @@ class TeamInscriptionLayoutView(discord.ui.LayoutView):
 
         async def team_mate_select_callback(interaction: discord.Interaction):
             await interaction.response.defer(ephemeral=True)
-            self.secondPlayer = interaction.guild.get_member(int(interaction.data["values"][0]))
+            secondPlayerId = int(interaction.data["values"][0])
+            # Le membre peut être absent du cache avec le profil de cache "lean"
+            self.secondPlayer = interaction.guild.get_member(secondPlayerId) or await interaction.guild.fetch_member(secondPlayerId)
             if self.firstPlayer.id == self.secondPlayer.id:
                 await self.interaction.edit_original_response(view=ErrorLayoutView("You can't be your own team mate."))
                 return
-            if self.secondPlayer in interaction.guild.get_role(self.database.get("player_role_id")).members:
+            if rl.has_role(self.secondPlayer, self.config.playerRoleId):
                 await self.interaction.edit_original_response(view=ErrorLayoutView("The selected player already has a team, if you think this is an error, please see with an admin."))
                 return
-            if self.secondPlayer in interaction.guild.get_role(self.database.get("spectator_role_id")).members:
-                await self.interaction.edit_original_response(view=ErrorLayoutView(f"The selected player is registered as a spectator, to remedy this, tell him to register as a player in the channel {interaction.guild.get_channel(self.database.get('rules_channel_id')).mention} !"))
+            if rl.has_role(self.secondPlayer, self.config.spectatorRoleId):
+                await self.interaction.edit_original_response(view=ErrorLayoutView(f"The selected player is registered as a spectator, to remedy this, tell him to register as a player in the channel {interaction.guild.get_channel(self.config.rulesChannelId).mention} !"))
                 return
-            if self.secondPlayer not in interaction.guild.get_role(self.database.get("registered_role_id")).members:
-                await self.interaction.edit_original_response(view=ErrorLayoutView(f"The selected player is not yet registered, to remedy this, tell him to register as a player in the channel {interaction.guild.get_channel(self.database.get('rules_channel_id')).mention} !"))
+            if not rl.has_role(self.secondPlayer, self.config.registeredRoleId):
+                await self.interaction.edit_original_response(view=ErrorLayoutView(f"The selected player is not yet registered, to remedy this, tell him to register as a player in the channel {interaction.guild.get_channel(self.config.rulesChannelId).mention} !"))
                 return
             self.firstSelect.disabled = False
             self.secondSelect.disabled = False
@@ -118,14 +125,14 @@ class TeamInscriptionLayoutView(discord.ui.LayoutView):
                 teamData = await hc.create_team(
                     self.firstPlayer, self.secondPlayer, self.firstMode, self.secondMode, self.thirdMode
                 )
-                await self.firstPlayer.add_roles(interaction.guild.get_role(self.database.get("player_role_id")))
-                await self.secondPlayer.add_roles(interaction.guild.get_role(self.database.get("player_role_id")))
+                await self.firstPlayer.add_roles(interaction.guild.get_role(self.config.playerRoleId))
+                await self.secondPlayer.add_roles(interaction.guild.get_role(self.config.playerRoleId))
                 teamRole = await interaction.guild.create_role(name=teamData["team_name"])
                 await self.firstPlayer.add_roles(teamRole)
                 await self.secondPlayer.add_roles(teamRole)
-                category = interaction.guild.get_channel(self.database.get("team_text_channels_category_id"))
-                adminRole = interaction.guild.get_role(self.database.get("admin_role_id"))
-                varRole = interaction.guild.get_role(self.database.get("var_role_id"))
+                category = interaction.guild.get_channel(self.config.teamTextChannelsCategoryId)
+                adminRole = interaction.guild.get_role(self.config.adminRoleId)
+                varRole = interaction.guild.get_role(self.config.varRoleId)
 
                 overwritesText = {
                     interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
@@ -141,7 +148,7 @@ class TeamInscriptionLayoutView(discord.ui.LayoutView):
                 if len(category.channels) == 50:
                     count = sum(1 for c in category.guild.categories if c.name.lower().startswith("salons d'équipes"))
                     newCategory = await interaction.guild.create_category_channel(f"Salons d'équipes {count + 1}")
-                    self.database.modify("team_text_channels_category_id", newCategory.id)
+                    self.config.update(teamTextChannelsCategoryId=newCategory.id)
                     category = newCategory
                 await category.create_voice_channel(f"team-{teamRole.name}", overwrites=overwritesVocal)
                 channel = await category.create_text_channel(f"team-{teamRole.name}", overwrites=overwritesText)
@@ -158,10 +165,10 @@ class TeamInscriptionLayoutView(discord.ui.LayoutView):
                 except Exception as e:
                     await self.log.send_log_embed(f"Impossible d'envoyer le message d'équipe à {self.secondPlayer.name} ({self.secondPlayer.id}) et {self.firstPlayer.name} ({self.firstPlayer.id})", dl.LogLevels.ERROR, e)
 
-                teamLayoutview = await TeamLayoutView.create(teamData)
+                teamLayoutview = await TeamLayoutView.create(teamData, self.log)
 
-                await interaction.guild.get_channel(self.database.get("registration_channel_id")).send(view=teamLayoutview)
-                await interaction.guild.get_channel(self.database.get("new_team_channel_id")).send(view=teamLayoutview)
+                await interaction.guild.get_channel(self.config.registrationChannelId).send(view=teamLayoutview)
+                await interaction.guild.get_channel(self.config.newTeamChannelId).send(view=teamLayoutview)
             except Exception:
                 traceback.print_exc()
 
@@ -235,7 +242,11 @@ class PlayerContainer(discord.ui.Container):
         super().__init__()
         titleTextDisplay = discord.ui.TextDisplay(f"## {intraData['name']}")
         playersData = intraData["playersData"]
-        countryTextDisplay = discord.ui.TextDisplay(f"Country : :flag_{playersData['countryCode'].lower()}:")
+        # Les données peuvent être partielles si l'API GeoGuessr n'a pas répondu à temps
+        if playersData.get("countryCode"):
+            countryTextDisplay = discord.ui.TextDisplay(f"Country : :flag_{playersData['countryCode'].lower()}:")
+        else:
+            countryTextDisplay = discord.ui.TextDisplay("Country : N/A")
         if playersData.get("rating"):
             eloTextDisplay = discord.ui.TextDisplay(f"Current ELO : {playersData['rating']}")
         else:
@@ -249,23 +260,29 @@ class PlayerContainer(discord.ui.Container):
             url=f"https://www.geoguessr.com/user/{intraData['geoguessrId']}",
             style=discord.ButtonStyle.link,
         )
-        self.add_item(
-            discord.ui.Section(
-                titleTextDisplay,
-                countryTextDisplay,
-                accessory=discord.ui.Thumbnail(f"https://www.geoguessr.com/images/plain/{playersData['pin']['url']}"),
+        if playersData.get("pin", {}).get("url"):
+            self.add_item(
+                discord.ui.Section(
+                    titleTextDisplay,
+                    countryTextDisplay,
+                    accessory=discord.ui.Thumbnail(f"https://www.geoguessr.com/images/plain/{playersData['pin']['url']}"),
+                )
             )
-        )
-        self.add_item(eloTextDisplay)
-        self.add_item(bestCountriesTextDisplay)
-        self.add_item(discord.ui.ActionRow(profileButton))
+            self.add_item(eloTextDisplay)
+            self.add_item(bestCountriesTextDisplay)
+            self.add_item(discord.ui.ActionRow(profileButton))
+        else:
+            self.add_item(discord.ui.Section(titleTextDisplay, countryTextDisplay, accessory=profileButton))
+            self.add_item(eloTextDisplay)
+            self.add_item(bestCountriesTextDisplay)
 
     @classmethod
     async def create(cls, geoguessrId: str, name: str):
         """
         Creates a new PlayerContainer instance with the given geoguessrId and name.
 
-        This method first calls `hc.get_player_datas` to retrieve the player's data from their Geoguessr ID.
+        This method first calls `hc.get_player_datas` to retrieve the player's data from their Geoguessr ID
+        (from the profiles cache when possible, see `player_profiles.PlayerProfileCache`).
         It then creates a dictionary containing the player's data and passes it to the PlayerContainer constructor.
 
         :param geoguessrId: The Geoguessr ID of the player
@@ -306,18 +323,45 @@ class TeamLayoutView(discord.ui.LayoutView):
         self.add_item(player2Container)
 
     @classmethod
-    async def create(cls, teamData: dict):
+    async def create(cls, teamData: dict, log: Optional[dl.DiscordLog] = None, budget: float = TEAM_CARD_BUDGET):
         """
         Creates a new TeamLayoutView instance with the given teamData.
 
-        This method first creates two PlayerContainer instances with the given member1 and member2 data.
-        It then creates a new TeamLayoutView instance with the given teamData and the two PlayerContainer instances.
+        This method first fetches the data of both players at the same time (every GeoGuessr endpoint
+        in parallel), waiting at most `budget` seconds: a player not received in time is shown as "N/A".
+        It then creates a new TeamLayoutView instance with the given teamData and the two PlayerContainer instances,
+        and prints the time it took (sent to the log channel too when some player data is missing).
 
         :param teamData: A dictionary containing the team's data
         :type teamData: dict
+        :param log: The log channel to report incomplete cards to, defaults to None (console only)
+        :type log: DiscordLog, optional
+        :param budget: Maximum number of seconds to wait for the GeoGuessr API, defaults to TEAM_CARD_BUDGET
+        :type budget: float, optional
         :return: A new TeamLayoutView instance
         :rtype: TeamLayoutView
         """
-        player1Container = await PlayerContainer.create(teamData["member1_geoguessrId"], teamData["member1_surname"])
-        player2Container = await PlayerContainer.create(teamData["member2_geoguessrId"], teamData["member2_surname"])
-        return cls(teamData, player1Container, player2Container)
+        start = time.perf_counter()
+        player1Datas, player2Datas = await hc.get_players_datas_within(
+            [teamData["member1_geoguessrId"], teamData["member2_geoguessrId"]], budget
+        )
+        player1Container = PlayerContainer(
+            {"geoguessrId": teamData["member1_geoguessrId"], "name": teamData["member1_surname"], "playersData": player1Datas}
+        )
+        player2Container = PlayerContainer(
+            {"geoguessrId": teamData["member2_geoguessrId"], "name": teamData["member2_surname"], "playersData": player2Datas}
+        )
+        view = cls(teamData, player1Container, player2Container)
+        partial = [
+            name
+            for name, datas in ((teamData["member1_surname"], player1Datas), (teamData["member2_surname"], player2Datas))
+            if not datas.get("pin") or not datas.get("countryCode")
+        ]
+        logMessage = f"Carte de l'équipe {teamData['team_name']} construite en {(time.perf_counter() - start) * 1000:.0f} ms"
+        if partial:
+            logMessage += f" (données incomplètes pour {', '.join(partial)})"
+        print(logMessage)
+        # Le salon de logs ne reçoit que les cartes incomplètes, la durée reste dans la console
+        if log is not None and partial:
+            await log.send_log_embed(logMessage, dl.LogLevels.WARNING)
+        return view
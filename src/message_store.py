@@ -0,0 +1,122 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import discord
+
+# Taille approximative d'un enregistrement hors textes : objet à slots, entiers et entrée du dictionnaire
+RECORD_OVERHEAD = 300
+
+
+class StoredMessage:
+    """What the logs need to know about a message, without keeping the whole `discord.Message`."""
+
+    __slots__ = ("authorId", "authorName", "channelId", "guildId", "content", "createdAt", "storedAt")
+
+    def __init__(
+        self, authorId: int, authorName: str, channelId: int, guildId: int, content: str, createdAt: float, storedAt: float
+    ):
+        self.authorId = authorId
+        self.authorName = authorName
+        self.channelId = channelId
+        self.guildId = guildId
+        self.content = content
+        self.createdAt = createdAt
+        self.storedAt = storedAt
+
+    @property
+    def size(self) -> int:
+        return RECORD_OVERHEAD + sys.getsizeof(self.content) + sys.getsizeof(self.authorName)
+
+
+class MessageContentStore:
+    """
+    Keeps the content of the recent messages to log their deletion or edition, even when discord.py
+    no longer has them in its message cache.
+
+    The records are evicted in least recently used order when the store goes over `maxBytes`, and
+    after `ttl` seconds.
+    """
+
+    def __init__(self, maxBytes: int = 64 * 1024 * 1024, ttl: float = 7 * 24 * 3600):
+        """
+        Args:
+            maxBytes (int, optional): Memory budget of the store, in bytes. Defaults to 64 MiB.
+            ttl (float, optional): Seconds a message is kept. Defaults to 7 days.
+        """
+        self.maxBytes = maxBytes
+        self.ttl = ttl
+        self.messages: OrderedDict[int, StoredMessage] = OrderedDict()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def add(self, message: discord.Message):
+        """Stores a new message."""
+        self.put(
+            message.id,
+            StoredMessage(
+                message.author.id,
+                str(message.author),
+                message.channel.id,
+                message.guild.id if message.guild else 0,
+                message.content,
+                message.created_at.timestamp(),
+                time.monotonic(),
+            ),
+        )
+
+    def put(self, messageId: int, record: StoredMessage):
+        self.discard(messageId)
+        self.messages[messageId] = record
+        self.size += record.size
+        self._evict()
+
+    def get(self, messageId: int) -> Optional[StoredMessage]:
+        record = self.messages.get(messageId)
+        if record is None:
+            return None
+        if time.monotonic() - record.storedAt > self.ttl:
+            self.discard(messageId)
+            return None
+        self.messages.move_to_end(messageId)
+        return record
+
+    def pop(self, messageId: int) -> Optional[StoredMessage]:
+        """Removes a message (deleted on Discord) and returns it if it was known."""
+        record = self.get(messageId)
+        self.discard(messageId)
+        return record
+
+    def discard(self, messageId: int):
+        record = self.messages.pop(messageId, None)
+        if record is not None:
+            self.size -= record.size
+
+    def update_content(self, messageId: int, content: str) -> Optional[str]:
+        """
+        Replaces the content of a stored message.
+
+        Returns:
+            str: The previous content, or None if the message is not stored.
+        """
+        record = self.get(messageId)
+        if record is None:
+            return None
+        previousContent = record.content
+        self.size -= record.size
+        record.content = content
+        self.size += record.size
+        self._evict()
+        return previousContent
+
+    def _evict(self):
+        # Les plus anciens (en dernier accès) sont en tête
+        expiredBefore = time.monotonic() - self.ttl
+        while self.messages:
+            messageId, record = next(iter(self.messages.items()))
+            if self.size <= self.maxBytes and record.storedAt >= expiredBefore:
+                break
+            self.discard(messageId)
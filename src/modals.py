@@ -2,11 +2,9 @@ from datetime import datetime
 
 import discord
 from discord import ui
-from easyDB import DB
 
 import hellcup as hc
-
-db = DB("hellbot")
+from config import config
 
 
 class RegisterModal(ui.Modal):
@@ -49,16 +47,23 @@ class RegisterModal(ui.Modal):
                 geoguessrLink if "www.geoguessr.com/user" not in geoguessrLink else geoguessrLink.split("/")[-1]
             ),
         }
-        if not await hc.is_geoguessr_id_correct(member["geoguessrId"]):
+        isGeoguessrIdCorrect = await hc.is_geoguessr_id_correct(member["geoguessrId"])
+        if isGeoguessrIdCorrect is None:
+            # GeoGuessr indisponible ou limite de requêtes : l'ID n'est pas forcément faux
+            await interaction.followup.send(
+                f":hourglass: {interaction.user.mention}\n\nWe could not check your Geoguessr profile right now, GeoGuessr seems to be unavailable. Please try again in a few minutes!",
+                ephemeral=True,
+            )
+        elif not isGeoguessrIdCorrect:
             await interaction.followup.send(
                 f":warning: {interaction.user.mention} :warning:\n\nThe link to your Geoguessr profile seems to be incorrect. To find it, go to https://www.geoguessr.com/me/profile and click on your profile picture) If you think this is a mistake, please contact an admin!",
                 ephemeral=True,
             )
         else:
             await hc.inscription(member)
-            await interaction.user.add_roles(interaction.guild.get_role(db.get("registered_role_id")))
-            await interaction.user.remove_roles(interaction.guild.get_role(db.get("spectator_role_id")))
-            await interaction.user.remove_roles(interaction.guild.get_role(db.get("newbie_role_id")))
+            await interaction.user.add_roles(interaction.guild.get_role(config.registeredRoleId))
+            await interaction.user.remove_roles(interaction.guild.get_role(config.spectatorRoleId))
+            await interaction.user.remove_roles(interaction.guild.get_role(config.newbieRoleId))
             await interaction.followup.send(
                 f":tada: Welcome on board {interaction.user.mention} ! :tada:\n\nYou are now registered as a player, please create your team with the `/team` command in any text channel.",
                 ephemeral=True,
@@ -74,4 +79,4 @@ class RegisterModal(ui.Modal):
             )
             embed.add_field(name="ID Geoguessr", value=member["geoguessrId"], inline=True)
             embed.add_field(name="Inscription date", value=datetime.now().strftime("%d/%m/%Y à %H:%M"), inline=True)
-            await interaction.guild.get_channel(db.get("registration_channel_id")).send(embed=embed)
+            await interaction.guild.get_channel(config.registrationChannelId).send(embed=embed)
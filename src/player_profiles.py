@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import traceback
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+PROFILES_PATH = os.path.join(os.path.dirname(__file__), "..", "json", "player_profiles.json")
+
+
+class PartialProfile(dict):
+    """A profile returned by `fetch` when some of its requests failed, kept only `partialTtl` seconds."""
+
+
+class PlayerProfileCache:
+    """
+    Cache of the GeoGuessr player profiles, keyed by GeoGuessr ID.
+
+    A profile younger than `ttl` is returned as is. An older one is still returned right away,
+    and refreshed in the background (stale-while-revalidate); only a profile older than `maxStale`,
+    or unknown, is waited for. At most `maxSize` profiles are kept, the least recently used
+    ones are evicted first. A `PartialProfile` is fresh for `partialTtl` seconds only, so the missing
+    data is requested again soon. The cache is written to `path` in a thread (a few seconds after the changes) and
+    reloaded at startup.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[dict]],
+        path: str = PROFILES_PATH,
+        ttl: float = 3600,
+        maxStale: float = 7 * 24 * 3600,
+        maxSize: int = 2000,
+        persistDelay: float = 5.0,
+        partialTtl: float = 60,
+    ):
+        """
+        Args:
+            fetch (Callable[[str], Awaitable[dict]]): Fetches a profile from the GeoGuessr API.
+            path (str, optional): JSON file of the cache. Defaults to PROFILES_PATH.
+            ttl (float, optional): Seconds a profile is fresh. Defaults to 3600.
+            maxStale (float, optional): Seconds after which a stale profile is no longer returned. Defaults to 7 days.
+            maxSize (int, optional): Maximum number of profiles. Defaults to 2000.
+            persistDelay (float, optional): Seconds to wait before writing the changes. Defaults to 5.0.
+            partialTtl (float, optional): Seconds a `PartialProfile` is fresh. Defaults to 60.
+        """
+        self.fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        self.maxStale = maxStale
+        self.maxSize = maxSize
+        self.persistDelay = persistDelay
+        self.partialTtl = partialTtl
+        # geoguessrId -> (profil, date de récupération en secondes depuis epoch)
+        self.profiles: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._refreshTasks: dict[str, asyncio.Task] = {}
+        self._persistTask: Optional[asyncio.Task] = None
+        self.hits = self.staleHits = self.misses = 0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as profilesFile:
+                data = json.load(profilesFile)
+        except (OSError, ValueError):
+            traceback.print_exc()
+            return
+        for geoguessrId, (profile, fetchedAt) in sorted(data.items(), key=lambda item: item[1][1]):
+            self.profiles[geoguessrId] = (profile, fetchedAt)
+        self._evict()
+
+    def _snapshot(self) -> dict:
+        # Copie prise sur la boucle : le thread d'écriture ne lit pas `profiles` pendant qu'il change
+        return {geoguessrId: list(entry) for geoguessrId, entry in self.profiles.items()}
+
+    def save(self):
+        """Writes the cache now, from the calling thread (at shutdown)."""
+        self._write(self._snapshot())
+
+    def _write(self, snapshot: dict):
+        """Writes a snapshot of the cache atomically (temporary file then rename)."""
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fileDescriptor, temporaryPath = tempfile.mkstemp(dir=directory, prefix=".player_profiles.", suffix=".json")
+        try:
+            with os.fdopen(fileDescriptor, "w", encoding="utf-8") as temporaryFile:
+                json.dump(snapshot, temporaryFile)
+            os.replace(temporaryPath, self.path)
+        except BaseException:
+            if os.path.exists(temporaryPath):
+                os.remove(temporaryPath)
+            raise
+
+    def _schedule_persist(self):
+        if self._persistTask is None or self._persistTask.done():
+            self._persistTask = asyncio.create_task(self._persist_later())
+
+    async def _persist_later(self):
+        await asyncio.sleep(self.persistDelay)
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except OSError:
+            traceback.print_exc()
+
+    def flush(self):
+        """Writes the pending changes now (at shutdown)."""
+        if self._persistTask is not None and not self._persistTask.done():
+            self._persistTask.cancel()
+            self.save()
+
+    def _evict(self):
+        while len(self.profiles) > self.maxSize:
+            self.profiles.popitem(last=False)
+
+    def put(self, geoguessrId: str, profile: dict, fetchedAt: Optional[float] = None):
+        """Stores a profile and schedules the write of the cache (used by the requests of `fetch`)."""
+        self.profiles[geoguessrId] = (profile, time.time() if fetchedAt is None else fetchedAt)
+        self.profiles.move_to_end(geoguessrId)
+        self._evict()
+        self._schedule_persist()
+
+    def _refresh(self, geoguessrId: str) -> asyncio.Task:
+        # Une seule requête en cours par joueur, partagée par `get`, `get_within` et les rafraîchissements
+        task = self._refreshTasks.get(geoguessrId)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(geoguessrId))
+            self._refreshTasks[geoguessrId] = task
+            task.add_done_callback(lambda done: self._forget_refresh(geoguessrId, done))
+        return task
+
+    def _forget_refresh(self, geoguessrId: str, task: asyncio.Task):
+        self._refreshTasks.pop(geoguessrId, None)
+        # Une requête abandonnée par `get_within` peut échouer sans que personne ne l'attende
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_and_store(self, geoguessrId: str) -> dict:
+        profile = await self.fetch(geoguessrId)
+        fetchedAt = time.time()
+        if isinstance(profile, PartialProfile):
+            # Daté plus tôt : le profil devient périmé (et rafraîchi) après `partialTtl` secondes
+            fetchedAt -= max(0.0, self.ttl - self.partialTtl)
+        self.put(geoguessrId, profile, fetchedAt)
+        return profile
+
+    async def _refresh_in_background(self, geoguessrId: str):
+        try:
+            await self._refresh(geoguessrId)
+        except Exception:
+            traceback.print_exc()
+
+    def get_cached(self, geoguessrId: str) -> Optional[dict]:
+        """
+        Returns the profile of a player if the cache has a usable one, without waiting for the API.
+
+        A stale profile is refreshed in the background.
+        """
+        entry = self.profiles.get(geoguessrId)
+        if entry is None:
+            return None
+        profile, fetchedAt = entry
+        age = time.time() - fetchedAt
+        if age > self.maxStale:
+            return None
+        self.profiles.move_to_end(geoguessrId)
+        if age <= self.ttl:
+            self.hits += 1
+        else:
+            self.staleHits += 1
+            asyncio.create_task(self._refresh_in_background(geoguessrId))
+        return profile
+
+    async def get(self, geoguessrId: str) -> dict:
+        """Returns the profile of a player, from the cache when possible."""
+        profile = self.get_cached(geoguessrId)
+        if profile is not None:
+            return profile
+        self.misses += 1
+        return await asyncio.shield(self._refresh(geoguessrId))
+
+    async def get_within(self, geoguessrIds: list[str], budget: float) -> list[dict]:
+        """
+        Returns the profiles of several players at once, waiting at most `budget` seconds.
+
+        The usable cached profiles are returned right away. The others are fetched at the same time;
+        a profile not received in time (or whose request failed) is returned as an empty dict, and its
+        request goes on in the background to fill the cache.
+
+        Args:
+            geoguessrIds (list[str]): The GeoGuessr IDs of the players.
+            budget (float): Maximum number of seconds to wait.
+
+        Returns:
+            list[dict]: The profile of each player (possibly empty), in the order of `geoguessrIds`.
+        """
+        profiles = [self.get_cached(geoguessrId) for geoguessrId in geoguessrIds]
+        tasks = {}
+        for index, geoguessrId in enumerate(geoguessrIds):
+            if profiles[index] is None:
+                self.misses += 1
+                tasks[index] = self._refresh(geoguessrId)
+        if tasks:
+            await asyncio.wait(set(tasks.values()), timeout=budget)
+        for index, task in tasks.items():
+            done = task.done() and not task.cancelled() and task.exception() is None
+            profiles[index] = task.result() if done else {}
+        return profiles
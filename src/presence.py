@@ -0,0 +1,71 @@
+import asyncio
+import time
+import traceback
+from typing import Optional
+
+import discord
+
+
+class MemberCountPresence:
+    """
+    Shows the member count of the HellCup guild in the bot status.
+
+    The count is kept up to date from the join and leave events, and the status is updated at most
+    once every `interval` seconds (presence updates are rate limited by the gateway). The last
+    update of a burst always publishes the latest count.
+    """
+
+    def __init__(self, client: discord.Client, guildId: int, interval: float = 30):
+        """
+        Args:
+            client (discord.Client): The bot whose status is updated.
+            guildId (int): The guild whose members are counted.
+            interval (float, optional): Minimum number of seconds between two updates. Defaults to 30.
+        """
+        self.client = client
+        self.guildId = guildId
+        self.interval = interval
+        self.memberCount: Optional[int] = None
+        self._publishedCount: Optional[int] = None
+        self._lastPublish = float("-inf")
+        self._publishTask: Optional[asyncio.Task] = None
+
+    def set_count(self, memberCount: int):
+        """Sets the member count, for example from `guild.member_count` in `on_ready`."""
+        self.memberCount = memberCount
+        self._schedule()
+
+    def on_member_join(self, member: discord.Member):
+        if member.guild.id == self.guildId and self.memberCount is not None:
+            self.memberCount += 1
+            self._schedule()
+
+    def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Événement brut : reçu aussi pour les membres absents du cache (profil "lean")
+        if payload.guild_id == self.guildId and self.memberCount is not None:
+            self.memberCount -= 1
+            self._schedule()
+
+    def _schedule(self):
+        if self._publishTask is None or self._publishTask.done():
+            self._publishTask = asyncio.create_task(self._publish_later())
+
+    async def _publish_later(self):
+        await asyncio.sleep(max(0.0, self._lastPublish + self.interval - time.monotonic()))
+        if self.memberCount == self._publishedCount:
+            return
+        memberCount = self.memberCount
+        self._lastPublish = time.monotonic()
+        try:
+            await self.client.change_presence(
+                activity=discord.Activity(
+                    name=f"{memberCount} (really) cool members !",
+                    type=discord.ActivityType.competing,
+                )
+            )
+            self._publishedCount = memberCount
+        except Exception:
+            traceback.print_exc()
+        # Des arrivées ou départs pendant la mise à jour : une nouvelle mise à jour après l'intervalle
+        if self.memberCount != self._publishedCount:
+            self._publishTask = asyncio.create_task(self._publish_later())
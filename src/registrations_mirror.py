@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Position des champs dans une ligne du miroir, qui suit l'ordre des colonnes A -> D de la feuille "Inscrits"
+DISCORD_ID_COLUMN = 1
+GEOGUESSR_ID_COLUMN = 2
+SURNAME_COLUMN = 3
+TEAM_FLAG_COLUMN = 4
+# En-têtes des colonnes lues par le miroir (la colonne D n'a pas d'en-tête fixe, elle est prise par position)
+HEADERS = ("ID Discord", "ID GeoGuessr", "Pseudo/surnom")
+
+
+@dataclass
+class Registration:
+    """A registered player, as stored in one row of the "Inscrits" worksheet."""
+
+    row: int
+    discordId: str
+    geoguessrId: str
+    surname: str
+    hasTeam: bool = False
+
+
+class RegistrationsMirror:
+    """
+    In-memory copy of the "Inscrits" worksheet, indexed by Discord ID and GeoGuessr ID.
+
+    Each entry keeps the number of its row in the sheet so a player can be updated
+    without reading the sheet again.
+    """
+
+    def __init__(self):
+        self.byDiscordId: dict[str, Registration] = {}
+        self.byGeoguessrId: dict[str, Registration] = {}
+        self.lastRow = 1  # la ligne 1 est l'en-tête
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.byDiscordId)
+
+    def clear(self):
+        """Forget every entry, the next refresh has to reload the whole sheet."""
+        self.byDiscordId.clear()
+        self.byGeoguessrId.clear()
+        self.lastRow = 1
+        self.loaded = False
+
+    def add_row(self, row: int, values: list):
+        """
+        Adds (or replaces) one sheet row in the mirror.
+
+        Args:
+            row (int): The row number in the sheet.
+            values (list): The cell values of the row, in the order of the mirror fields.
+        """
+        values = [str(value) for value in values] + [""] * (TEAM_FLAG_COLUMN - len(values))
+        if not values[DISCORD_ID_COLUMN - 1]:
+            self.lastRow = max(self.lastRow, row)
+            return
+        registration = Registration(
+            row=row,
+            discordId=values[DISCORD_ID_COLUMN - 1],
+            geoguessrId=values[GEOGUESSR_ID_COLUMN - 1],
+            surname=values[SURNAME_COLUMN - 1],
+            hasTeam=values[TEAM_FLAG_COLUMN - 1] not in ("", "0"),
+        )
+        previous = self.byDiscordId.get(registration.discordId)
+        if previous is not None and self.byGeoguessrId.get(previous.geoguessrId) is previous:
+            del self.byGeoguessrId[previous.geoguessrId]
+        self.byDiscordId[registration.discordId] = registration
+        self.byGeoguessrId[registration.geoguessrId] = registration
+        self.lastRow = max(self.lastRow, row)
+
+    def load(self, values: list[list], firstRow: int = 2):
+        """
+        Adds a block of consecutive rows, as returned by the Sheets API.
+
+        Args:
+            values (list): The rows, without the header.
+            firstRow (int, optional): The sheet row number of the first element. Defaults to 2.
+        """
+        for offset, rowValues in enumerate(values):
+            self.add_row(firstRow + offset, rowValues)
+        self.loaded = True
+
+    def get_by_discord_id(self, discordId) -> Optional[Registration]:
+        return self.byDiscordId.get(str(discordId))
+
+    def get_by_geoguessr_id(self, geoguessrId: str) -> Optional[Registration]:
+        return self.byGeoguessrId.get(geoguessrId)
+
+    def mark_team(self, discordId):
+        """Flags the player as being in a team."""
+        registration = self.get_by_discord_id(discordId)
+        if registration is not None:
+            registration.hasTeam = True
+
+
+def row_from_updated_range(updatedRange: str) -> Optional[int]:
+    """
+    Extracts the row number from an A1 range such as "Inscrits!A12:D12".
+
+    Returns None if the range can not be parsed.
+    """
+    match = re.search(r"![A-Z]+(\d+)", updatedRange)
+    return int(match.group(1)) if match else None
@@ -0,0 +1,21 @@
+from typing import Union
+
+import discord
+
+
+def has_role(member: Union[discord.Member, discord.User, None], roleId: int) -> bool:
+    """
+    Tells if a member has a role, from the role IDs of the member.
+
+    Unlike `member in role.members`, which goes through every cached member of the guild, this
+    does not depend on the size of the guild. A `discord.User` (in DMs) has no roles.
+
+    Args:
+        member (discord.Member | discord.User | None): The member to check.
+        roleId (int): The ID of the role.
+
+    Returns:
+        bool: True if the member has the role.
+    """
+    getRole = getattr(member, "get_role", None)
+    return getRole is not None and getRole(roleId) is not None
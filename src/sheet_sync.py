@@ -0,0 +1,284 @@
+import asyncio
+import time
+import traceback
+from typing import Optional
+
+import gspread_utilities as gu
+import registrations_mirror as rm
+import sheets_scheduler as ss
+import storage as st
+
+
+class SheetSyncWorker:
+    """
+    Keeps the Google Sheets document in sync with the SQLite store.
+
+    New registrations, teams and bets are appended to the "Inscrits", "Teams" and "Bets"
+    worksheets (one `append_rows` per worksheet and per cycle). For modified registrations, only
+    the cells that differ from the sheet are written, in the row found again by Discord ID. The edits
+    made by the organizers in "Inscrits", "Qualifiés" and "Bets" are imported back on a slower
+    schedule. Teams are only exported.
+
+    The worker has its own connection to the database (`SQLiteStorage.connect`), and its queries
+    run in a thread: an import or an export of thousands of rows does not block the bot.
+    """
+
+    def __init__(self, store: st.SQLiteStorage, exportInterval: float = 10, importInterval: float = 300):
+        """
+        Args:
+            store (SQLiteStorage): The SQLite store to mirror.
+            exportInterval (float, optional): Seconds between two exports. Defaults to 10.
+            importInterval (float, optional): Seconds between two imports of the organizers edits. Defaults to 300.
+        """
+        self.store = store
+        self.connection = store.connect()
+        self.exportInterval = exportInterval
+        self.importInterval = importInterval
+        self.lastImport: Optional[float] = None
+        # Un export et un import ne doivent pas se croiser ($refresh_bets pendant un cycle)
+        self.lock = asyncio.Lock()
+
+    def _read(self, query: str) -> list[tuple]:
+        return self.connection.execute(query).fetchall()
+
+    def _write(self, statements: list[tuple[str, list]]):
+        """Runs every statement (`executemany`) in one transaction."""
+        with self.connection:
+            for query, parameters in statements:
+                self.connection.executemany(query, parameters)
+
+    async def _append_rows(self, worksheetName: str, rows: list[list]) -> int:
+        """Appends rows to a worksheet and returns the sheet row number of the first one."""
+        response = await gu.run_on_worksheet(
+            worksheetName, lambda worksheet: worksheet.append_rows(rows), "write", ss.Priority.BACKGROUND
+        )
+        firstRow = rm.row_from_updated_range(response.get("updates", {}).get("updatedRange", ""))
+        if firstRow is None:
+            raise ValueError(f"Réponse inattendue de l'API pour l'ajout dans {worksheetName} : {response}")
+        return firstRow
+
+    async def _update_registrations(self, registrations: list[tuple]) -> set[str]:
+        """
+        Writes the modified registrations in "Inscrits", only the cells that differ from the sheet.
+
+        The row of each player is found again by Discord ID (column A, never written) just before
+        writing: the organizers may have inserted, deleted or sorted rows since `sheet_row` was stored.
+
+        Returns:
+            set[str]: The Discord IDs no longer in the sheet, appended again by the next export.
+        """
+        rows = await gu.get_columns(
+            "Inscrits", list(rm.HEADERS) + [rm.TEAM_FLAG_COLUMN], priority=ss.Priority.BACKGROUND
+        )
+        sheetRows = {str(row[0]): (index + 2, row) for index, row in enumerate(rows) if str(row[0])}
+        updates, relocated, missing = [], [], set()
+        for discordId, geoguessrId, surname, hasTeam, _ in registrations:
+            if discordId not in sheetRows:
+                missing.add(discordId)
+                continue
+            row, sheetValues = sheetRows[discordId]
+            relocated.append((row, discordId))
+            if str(sheetValues[1]) != geoguessrId:
+                updates.append({"range": f"B{row}", "values": [[geoguessrId]]})
+            if str(sheetValues[2]) != surname:
+                updates.append({"range": f"C{row}", "values": [[surname]]})
+            if (str(sheetValues[3]) not in ("", "0")) != bool(hasTeam):
+                updates.append({"range": f"D{row}", "values": [[hasTeam]]})
+        if updates:
+            await gu.run_on_worksheet(
+                "Inscrits", lambda worksheet: worksheet.batch_update(updates), "write", ss.Priority.BACKGROUND
+            )
+        await asyncio.to_thread(
+            self._write,
+            [
+                ("UPDATE registrations SET sheet_row = ? WHERE discord_id = ?", relocated),
+                # Ligne supprimée de la feuille : elle sera ajoutée de nouveau au prochain export
+                (
+                    "UPDATE registrations SET sheet_row = NULL WHERE discord_id = ?",
+                    [(discordId,) for discordId in missing],
+                ),
+            ],
+        )
+        return missing
+
+    async def export_once(self):
+        """Sends to the sheet everything that changed in the store since the last export."""
+        async with self.lock:
+            await self._export()
+
+    async def _export(self):
+        registrations = await asyncio.to_thread(
+            self._read,
+            "SELECT discord_id, geoguessr_id, surname, has_team, sheet_row FROM registrations WHERE dirty = 1",
+        )
+        newRegistrations = [registration for registration in registrations if registration[4] is None]
+        if newRegistrations:
+            firstRow = await self._append_rows("Inscrits", [list(registration[:4]) for registration in newRegistrations])
+            await asyncio.to_thread(
+                self._write,
+                [
+                    (
+                        "UPDATE registrations SET sheet_row = ? WHERE discord_id = ?",
+                        [(firstRow + offset, registration[0]) for offset, registration in enumerate(newRegistrations)],
+                    )
+                ],
+            )
+        updatedRegistrations = [registration for registration in registrations if registration[4] is not None]
+        missing = await self._update_registrations(updatedRegistrations) if updatedRegistrations else set()
+        registrations = [registration for registration in registrations if registration[0] not in missing]
+        if registrations:
+            await asyncio.to_thread(
+                self._write,
+                [
+                    (
+                        # Seulement si la ligne n'a pas encore été modifiée pendant l'export
+                        """
+                        UPDATE registrations SET dirty = 0
+                        WHERE discord_id = ? AND geoguessr_id = ? AND surname = ? AND has_team = ?
+                        """,
+                        [registration[:4] for registration in registrations],
+                    )
+                ],
+            )
+
+        teams = await asyncio.to_thread(
+            self._read,
+            """
+            SELECT id, member1_discord_id, member1_geoguessr_id, member2_discord_id, member2_geoguessr_id,
+                   member1_surname, member2_surname, team_name, first_mode, second_mode, third_mode
+            FROM teams WHERE sheet_row IS NULL ORDER BY id
+            """,
+        )
+        if teams:
+            firstRow = await self._append_rows("Teams", [list(team[1:]) for team in teams])
+            await asyncio.to_thread(
+                self._write,
+                [
+                    (
+                        "UPDATE teams SET sheet_row = ? WHERE id = ?",
+                        [(firstRow + offset, team[0]) for offset, team in enumerate(teams)],
+                    )
+                ],
+            )
+
+        bets = await asyncio.to_thread(
+            self._read,
+            """
+            SELECT discord_id, bet1, bet2, bet3, is_anonymous, discord_name
+            FROM bets WHERE sheet_row IS NULL ORDER BY rowid
+            """,
+        )
+        if bets:
+            firstRow = await self._append_rows(
+                "Bets", [[str(bet[0]), bet[1], bet[2], bet[3], bool(bet[4]), bet[5]] for bet in bets]
+            )
+            await asyncio.to_thread(
+                self._write,
+                [
+                    (
+                        "UPDATE bets SET sheet_row = ? WHERE discord_id = ?",
+                        [(firstRow + offset, bet[0]) for offset, bet in enumerate(bets)],
+                    )
+                ],
+            )
+
+    async def import_once(self):
+        """Imports the organizers edits from the sheet, without overwriting changes not exported yet."""
+        async with self.lock:
+            await self._import()
+        self.lastImport = time.monotonic()
+
+    async def _import(self):
+        priority = ss.Priority.BACKGROUND
+
+        rows = await gu.get_columns("Inscrits", list(rm.HEADERS) + [rm.TEAM_FLAG_COLUMN], priority=priority)
+        registrations = [
+            (str(row[0]), str(row[1]), str(row[2]), int(str(row[3]) not in ("", "0")), index + 2)
+            for index, row in enumerate(rows)
+            if str(row[0])
+        ]
+        await asyncio.to_thread(
+            self._write,
+            [
+                (
+                    "UPDATE registrations SET sheet_row = ? WHERE discord_id = ? AND sheet_row IS NULL",
+                    [(registration[4], registration[0]) for registration in registrations],
+                ),
+                (
+                    """
+                    INSERT INTO registrations (discord_id, geoguessr_id, surname, has_team, sheet_row, dirty)
+                    VALUES (?, ?, ?, ?, ?, 0)
+                    ON CONFLICT (discord_id) DO UPDATE
+                    SET geoguessr_id = excluded.geoguessr_id, surname = excluded.surname,
+                        has_team = excluded.has_team, sheet_row = excluded.sheet_row
+                    WHERE registrations.dirty = 0
+                    """,
+                    registrations,
+                ),
+            ],
+        )
+
+        qualifiedTeams = await gu.get_column("Qualifiés", "Nom d'équipe", priority=priority)
+        await asyncio.to_thread(
+            self._write,
+            [
+                ("DELETE FROM qualified_teams", [()]),
+                (
+                    "INSERT OR IGNORE INTO qualified_teams (team_name) VALUES (?)",
+                    [(name,) for name in qualifiedTeams if name != ""],
+                ),
+            ],
+        )
+
+        bettorIds = await gu.get_column("Bets", "DiscordId", priority=priority)
+        sheetBets, invalidRows = {}, []
+        for index, discordId in enumerate(bettorIds):
+            if str(discordId).strip() == "":
+                continue
+            try:
+                sheetBets[int(str(discordId).strip())] = index + 2
+            except ValueError:
+                invalidRows.append(index + 2)
+        if invalidRows:
+            # Cellule modifiée à la main : la ligne est ignorée, le reste de l'import continue
+            print(f"Import de la feuille Bets : ID Discord invalide ignoré aux lignes {invalidRows}")
+        exportedBets = {
+            row[0]
+            for row in await asyncio.to_thread(self._read, "SELECT discord_id FROM bets WHERE sheet_row IS NOT NULL")
+        }
+        await asyncio.to_thread(
+            self._write,
+            [
+                (
+                    # Paris ajoutés à la main par les organisateurs (seul l'ID compte pour l'éligibilité)
+                    """
+                    INSERT INTO bets (discord_id, bet1, bet2, bet3, is_anonymous, discord_name, sheet_row)
+                    VALUES (?, '', '', '', 0, '', ?)
+                    ON CONFLICT (discord_id) DO UPDATE SET sheet_row = excluded.sheet_row
+                    """,
+                    list(sheetBets.items()),
+                ),
+                # Paris supprimés de la feuille par les organisateurs
+                (
+                    "DELETE FROM bets WHERE discord_id = ?",
+                    [(discordId,) for discordId in exportedBets - sheetBets.keys()],
+                ),
+            ],
+        )
+
+    async def run(self):
+        """
+        Background task: exports and imports on their own schedules.
+
+        The first import is expected to be awaited before (`HellBot.setup_hook`); if it failed, it is
+        done by the first cycle.
+        """
+        while True:
+            try:
+                # On exporte d'abord pour que l'import ne voie pas des lignes encore absentes de la feuille
+                await self.export_once()
+                if self.lastImport is None or time.monotonic() - self.lastImport >= self.importInterval:
+                    await self.import_once()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.exportInterval)
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import traceback
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+import registrations_mirror as rm
+
+JOURNAL_PATH = os.path.join(os.path.dirname(__file__), "..", "json", "sheet_write_journal.jsonl")
+
+
+class _PendingWrite:
+    __slots__ = ("writeId", "operation", "worksheetName", "data", "future")
+
+    def __init__(self, writeId: str, operation: str, worksheetName: str, data: Any, future: Optional[asyncio.Future]):
+        self.writeId = writeId
+        self.operation = operation
+        self.worksheetName = worksheetName
+        self.data = data
+        self.future = future
+
+
+def _journal_entry(pendingWrite: _PendingWrite) -> dict:
+    return {
+        "id": pendingWrite.writeId,
+        "op": pendingWrite.operation,
+        "worksheet": pendingWrite.worksheetName,
+        "data": pendingWrite.data,
+    }
+
+
+class SheetWriteQueue:
+    """
+    Write-behind queue for the Google Sheets writes.
+
+    Rows appended to a worksheet and cell updates are kept in memory for a short time, then sent
+    together: one `append_rows` and one `batch_update` per worksheet and per flush. Every write is
+    also recorded in an on-disk journal (written in a thread, in order), so writes that were not committed when
+    the bot stopped are sent again at the next start. A failed write nobody waits for (replayed from
+    the journal) stays in the journal to be sent again at the next start, and is reported with
+    `onFailure`.
+    """
+
+    def __init__(
+        self,
+        runOnWorksheet: Callable[[str, Callable], Awaitable[Any]],
+        journalPath: str = JOURNAL_PATH,
+        flushDelay: float = 1.0,
+        maxBatchSize: int = 50,
+        onFailure: Optional[Callable[[str, int, Exception], Awaitable[None]]] = None,
+    ):
+        """
+        Args:
+            runOnWorksheet (Callable): Coroutine function running an operation on a worksheet, given its name.
+            journalPath (str, optional): Path of the journal file. Defaults to JOURNAL_PATH.
+            flushDelay (float, optional): Maximum time (in seconds) a write waits before being sent. Defaults to 1.0.
+            maxBatchSize (int, optional): Number of pending writes that triggers an immediate flush. Defaults to 50.
+            onFailure (Callable, optional): Coroutine function called with the worksheet name, the number of
+                writes and the error when writes nobody waits for fail. Defaults to None.
+        """
+        self.runOnWorksheet = runOnWorksheet
+        self.journalPath = journalPath
+        self.flushDelay = flushDelay
+        self.maxBatchSize = maxBatchSize
+        self.onFailure = onFailure
+        self.pending: list[_PendingWrite] = []
+        # Écritures échouées sans appelant pour recevoir l'erreur, gardées dans le journal
+        self.deferred: list[_PendingWrite] = []
+        self._flushLock = asyncio.Lock()
+        self._flushTask: Optional[asyncio.Task] = None
+        self._batchFlushTasks: set[asyncio.Task] = set()
+        # Opérations sur le journal pas encore écrites, appliquées dans l'ordre par un seul thread
+        self._journalOps: list[tuple[str, list[str]]] = []
+        self._journalTask: Optional[asyncio.Task] = None
+        self._load_journal()
+
+    def append(self, worksheetName: str, row: list) -> asyncio.Future:
+        """
+        Queues a row to append to a worksheet.
+
+        Returns:
+            asyncio.Future: Resolves to the sheet row number once the row is committed.
+        """
+        return self._enqueue("append", worksheetName, row)
+
+    def update(self, worksheetName: str, updates: list[dict]) -> asyncio.Future:
+        """
+        Queues cell updates on a worksheet, in the `batch_update` format ({"range": ..., "values": ...}).
+
+        Returns:
+            asyncio.Future: Resolves to None once the cells are committed.
+        """
+        return self._enqueue("update", worksheetName, updates)
+
+    def _enqueue(self, operation: str, worksheetName: str, data: Any) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        pendingWrite = _PendingWrite(uuid.uuid4().hex, operation, worksheetName, data, future)
+        self._journal(_journal_entry(pendingWrite))
+        self.pending.append(pendingWrite)
+        self._schedule_flush()
+        return future
+
+    def _schedule_flush(self):
+        if len(self.pending) >= self.maxBatchSize:
+            batchFlushTask = asyncio.create_task(self.flush())
+            self._batchFlushTasks.add(batchFlushTask)
+            batchFlushTask.add_done_callback(self._batchFlushTasks.discard)
+        elif self._flushTask is None or self._flushTask.done():
+            self._flushTask = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Les écritures arrivées pendant un envoi n'ont pas planifié d'envoi (cette tâche tournait encore)
+        while True:
+            await asyncio.sleep(self.flushDelay)
+            await self.flush()
+            if not self.pending:
+                return
+
+    async def flush(self):
+        """Sends every pending write, grouped by worksheet."""
+        async with self._flushLock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            byWorksheet: dict[str, list[_PendingWrite]] = {}
+            for pendingWrite in batch:
+                byWorksheet.setdefault(pendingWrite.worksheetName, []).append(pendingWrite)
+            for worksheetName, writes in byWorksheet.items():
+                # Les ajouts d'abord : une mise à jour peut viser une ligne ajoutée dans le même lot
+                await self._flush_appends(worksheetName, [w for w in writes if w.operation == "append"])
+                await self._flush_updates(worksheetName, [w for w in writes if w.operation == "update"])
+            if not self.pending:
+                self._compact_journal()
+        await self._drain_journal()
+
+    async def _flush_appends(self, worksheetName: str, writes: list[_PendingWrite]):
+        if not writes:
+            return
+        rows = [pendingWrite.data for pendingWrite in writes]
+        try:
+            response = await self.runOnWorksheet(worksheetName, lambda worksheet: worksheet.append_rows(rows))
+        except Exception as e:
+            await self._fail(worksheetName, writes, e)
+            return
+        updatedRange = response.get("updates", {}).get("updatedRange", "") if response else ""
+        firstRow = rm.row_from_updated_range(updatedRange)
+        for offset, pendingWrite in enumerate(writes):
+            self._succeed(pendingWrite, firstRow + offset if firstRow is not None else None)
+
+    async def _flush_updates(self, worksheetName: str, writes: list[_PendingWrite]):
+        if not writes:
+            return
+        updates = [update for pendingWrite in writes for update in pendingWrite.data]
+        try:
+            await self.runOnWorksheet(worksheetName, lambda worksheet: worksheet.batch_update(updates))
+        except Exception as e:
+            await self._fail(worksheetName, writes, e)
+            return
+        for pendingWrite in writes:
+            self._succeed(pendingWrite, None)
+
+    def _succeed(self, pendingWrite: _PendingWrite, result: Any):
+        self._journal({"id": pendingWrite.writeId, "done": True})
+        if pendingWrite.future is not None and not pendingWrite.future.done():
+            pendingWrite.future.set_result(result)
+
+    async def _fail(self, worksheetName: str, writes: list[_PendingWrite], error: Exception):
+        unawaited = []
+        for pendingWrite in writes:
+            if pendingWrite.future is not None and not pendingWrite.future.done():
+                # L'appelant reçoit l'erreur : on ne rejoue pas cette écriture au prochain démarrage
+                self._journal({"id": pendingWrite.writeId, "done": True})
+                pendingWrite.future.set_exception(error)
+            else:
+                # Personne n'attend cette écriture : elle reste dans le journal pour être rejouée
+                unawaited.append(pendingWrite)
+        if not unawaited:
+            return
+        self.deferred.extend(unawaited)
+        traceback.print_exception(type(error), error, error.__traceback__)
+        if self.onFailure is not None:
+            try:
+                await self.onFailure(worksheetName, len(unawaited), error)
+            except Exception:
+                traceback.print_exc()
+
+    def _journal(self, entry: dict):
+        self._queue_journal_op("append", [json.dumps(entry, ensure_ascii=False)])
+
+    def _compact_journal(self):
+        """Rewrites the journal with only the writes still to send (the deferred ones)."""
+        self._queue_journal_op("rewrite", [json.dumps(_journal_entry(w), ensure_ascii=False) for w in self.deferred])
+
+    def _queue_journal_op(self, operation: str, lines: list[str]):
+        self._journalOps.append((operation, lines))
+        if self._journalTask is None or self._journalTask.done():
+            self._journalTask = asyncio.create_task(self._write_journal())
+
+    async def _write_journal(self):
+        while self._journalOps:
+            operations, self._journalOps = self._journalOps, []
+            try:
+                await asyncio.to_thread(self._apply_journal_ops, operations)
+            except OSError:
+                traceback.print_exc()
+
+    async def _drain_journal(self):
+        """Waits until every journal operation queued so far is written to disk."""
+        while self._journalTask is not None and not self._journalTask.done():
+            await asyncio.shield(self._journalTask)
+
+    def _apply_journal_ops(self, operations: list[tuple[str, list[str]]]):
+        os.makedirs(os.path.dirname(self.journalPath), exist_ok=True)
+        for operation, lines in operations:
+            if operation == "rewrite" and os.path.exists(self.journalPath):
+                os.remove(self.journalPath)
+            if lines:
+                with open(self.journalPath, "a", encoding="utf-8") as journal:
+                    journal.writelines(line + "\n" for line in lines)
+
+    def _load_journal(self):
+        """
+        Queues again the writes of the journal that were never committed.
+
+        They are sent with the next flush.
+        """
+        if not os.path.exists(self.journalPath):
+            return
+        entries: dict[str, dict] = {}
+        with open(self.journalPath, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # ligne tronquée par un arrêt brutal
+                if entry.get("done"):
+                    entries.pop(entry["id"], None)
+                else:
+                    entries[entry["id"]] = entry
+        # Appelé sans boucle d'événements (à l'import) : le journal est réécrit directement
+        self._apply_journal_ops([("rewrite", [json.dumps(entry, ensure_ascii=False) for entry in entries.values()])])
+        for entry in entries.values():
+            self.pending.append(_PendingWrite(entry["id"], entry["op"], entry["worksheet"], entry["data"], None))
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Priority classes of the Google Sheets calls, the lowest value goes first."""
+
+    INTERACTIVE = 0  # un utilisateur attend la réponse (inscription, équipe, pari)
+    BACKGROUND = 1  # rafraîchissements, synchronisations, jobs planifiés
+
+
+class TokenBucket:
+    def __init__(self, ratePerMinute: float, capacity: float):
+        """
+        Initialize a token bucket.
+
+        Args:
+            ratePerMinute (float): Number of tokens added per minute.
+            capacity (float): Maximum number of tokens that can be spent in a burst.
+        """
+        self.rate = ratePerMinute / 60
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updatedAt = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updatedAt) * self.rate)
+        self.updatedAt = now
+
+    def time_until_token(self) -> float:
+        """Returns the number of seconds before a token is available (0 if one is available now)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def drain(self):
+        """Empties the bucket, used when Google answers that the quota is exceeded."""
+        self._refill()
+        self.tokens = min(self.tokens, 0)
+
+
+class _KindState:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.queue: list = []  # heap de (priorité, numéro d'ordre, date d'entrée, future)
+        self.pump: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.waitAverage = 0.0
+        self.waitMax = 0.0
+
+
+class SheetsScheduler:
+    """
+    Central scheduler for the Google Sheets API calls.
+
+    Reads and writes each have a token bucket matching their per-minute quota. When the quota is
+    reached, the calls wait in a priority queue so that interactive calls go before background
+    ones. Reads failing with a retryable error (429, 5xx) are retried with a jittered exponential
+    backoff. Writes are only retried when the quota is exceeded (429, rejected before being applied):
+    after a 5xx or a timeout, Google may have applied the write already, and retrying an
+    `append_rows` would duplicate the rows, so the error is raised to the caller.
+    """
+
+    def __init__(
+        self,
+        readsPerMinute: float = 60,
+        writesPerMinute: float = 60,
+        burst: float = 10,
+        isRetryable: Callable[[Exception], bool] = lambda e: False,
+        isQuotaExceeded: Callable[[Exception], bool] = lambda e: False,
+        maxRetries: int = 5,
+        baseBackoff: float = 1.0,
+        maxBackoff: float = 32.0,
+    ):
+        """
+        Args:
+            readsPerMinute (float, optional): Read quota per minute. Defaults to 60.
+            writesPerMinute (float, optional): Write quota per minute. Defaults to 60.
+            burst (float, optional): Calls of each kind that can be sent at once. Defaults to 10.
+            isRetryable (Callable, optional): Tells if a failed call can be retried.
+            isQuotaExceeded (Callable, optional): Tells if an error means that the quota is exceeded.
+            maxRetries (int, optional): Maximum number of retries of a call. Defaults to 5.
+            baseBackoff (float, optional): Backoff before the first retry, in seconds. Defaults to 1.0.
+            maxBackoff (float, optional): Maximum backoff, in seconds. Defaults to 32.0.
+        """
+        self.kinds = {
+            "read": _KindState(TokenBucket(readsPerMinute, burst)),
+            "write": _KindState(TokenBucket(writesPerMinute, burst)),
+        }
+        self.isRetryable = isRetryable
+        self.isQuotaExceeded = isQuotaExceeded
+        self.maxRetries = maxRetries
+        self.baseBackoff = baseBackoff
+        self.maxBackoff = maxBackoff
+        self.retries = 0
+        self.quotaExceeded = 0
+        self._order = itertools.count()
+
+    async def submit(
+        self, kind: str, call: Callable[[], Awaitable[T]], priority: Priority = Priority.INTERACTIVE
+    ) -> T:
+        """
+        Runs a Google Sheets call once the quota allows it, retrying it if needed (writes only on a 429).
+
+        Args:
+            kind (str): "read" or "write".
+            call (Callable): Coroutine function doing the call.
+            priority (Priority, optional): Priority of the call. Defaults to Priority.INTERACTIVE.
+
+        Returns:
+            The result of the call.
+        """
+        for attempt in range(self.maxRetries + 1):
+            await self._acquire(kind, priority)
+            try:
+                return await call()
+            except Exception as e:
+                if attempt == self.maxRetries or not self.isRetryable(e):
+                    raise
+                if kind == "write" and not self.isQuotaExceeded(e):
+                    raise
+                if self.isQuotaExceeded(e):
+                    self.quotaExceeded += 1
+                    self.kinds[kind].bucket.drain()
+                self.retries += 1
+                await asyncio.sleep(random.uniform(0, min(self.maxBackoff, self.baseBackoff * 2**attempt)))
+        raise AssertionError("unreachable")
+
+    async def _acquire(self, kind: str, priority: Priority):
+        state = self.kinds[kind]
+        if not state.queue and state.bucket.time_until_token() == 0:
+            state.bucket.take()
+            self._record_wait(state, 0.0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.queue, (int(priority), next(self._order), time.monotonic(), future))
+        if state.pump is None or state.pump.done():
+            state.pump = asyncio.create_task(self._pump(state))
+        await future
+
+    async def _pump(self, state: _KindState):
+        while state.queue:
+            wait = state.bucket.time_until_token()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            _, _, enqueuedAt, future = heapq.heappop(state.queue)
+            if future.cancelled():
+                continue
+            state.bucket.take()
+            self._record_wait(state, time.monotonic() - enqueuedAt)
+            future.set_result(None)
+
+    @staticmethod
+    def _record_wait(state: _KindState, wait: float):
+        state.granted += 1
+        state.waitAverage += (wait - state.waitAverage) * 0.1
+        state.waitMax = max(state.waitMax, wait)
+
+    def stats(self) -> dict:
+        """
+        Returns the scheduler metrics: queue depth and wait times per kind, retries and quota errors.
+        """
+        result = {"retries": self.retries, "quotaExceeded": self.quotaExceeded}
+        for kind, state in self.kinds.items():
+            result[kind] = {
+                "queued": len(state.queue),
+                "granted": state.granted,
+                "waitAverageMs": round(state.waitAverage * 1000, 1),
+                "waitMaxMs": round(state.waitMax * 1000, 1),
+                "tokens": round(state.bucket.tokens, 2),
+            }
+        return result
@@ -0,0 +1,340 @@
+import asyncio
+import os
+import random
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import discord
+
+import gspread_utilities as gu
+import registrations_mirror as rm
+import sheets_scheduler as ss
+
+SQLITE_PATH = os.path.join(os.path.dirname(__file__), "..", "json", "hellcup.sqlite3")
+
+
+def build_team_data(
+    player1: rm.Registration, player2: rm.Registration, firstMode: str, secondMode: str, thirdMode: str
+) -> dict[str, str]:
+    """
+    Builds the team dictionary returned by `create_team`, in the column order of the "Teams" worksheet.
+    """
+    return {
+        "member1_discordId": player1.discordId,
+        "member1_geoguessrId": player1.geoguessrId,
+        "member2_discordId": player2.discordId,
+        "member2_geoguessrId": player2.geoguessrId,
+        "member1_surname": player1.surname,
+        "member2_surname": player2.surname,
+        "team_name": player1.surname + "_" + player2.surname,
+        "firstMode": firstMode,
+        "secondMode": secondMode,
+        "thirdMode": thirdMode,
+    }
+
+
+class StorageBackend(ABC):
+    """
+    The tournament data operations used by the bot.
+
+    `member1`/`member2` only need `id` and `name` attributes, so load tests can pass simple objects
+    instead of `discord.Member`.
+    """
+
+    @abstractmethod
+    async def add_registration(self, member: dict):
+        """Registers a player ({"discordId", "geoguessrId", "surname"})."""
+
+    @abstractmethod
+    async def get_registration(self, discordId) -> Optional[rm.Registration]:
+        """Returns the registered player with this Discord ID, or None."""
+
+    @abstractmethod
+    async def list_registrations(self) -> list[rm.Registration]:
+        """Returns every registered player."""
+
+    @abstractmethod
+    async def create_team(
+        self, member1: discord.Member, member2: discord.Member, firstMode: str, secondMode: str, thirdMode: str
+    ) -> dict[str, str]:
+        """Creates a team of two registered players and returns its data (see `build_team_data`)."""
+
+    @abstractmethod
+    async def get_qualified_teams_names(self) -> list[str]:
+        """Returns the names of the qualified teams."""
+
+    @abstractmethod
+    async def has_bet(self, discordId: int) -> bool:
+        """Tells if this Discord ID has already placed a bet."""
+
+    @abstractmethod
+    async def place_bet(
+        self, discordId: int, bet1: str, bet2: str, bet3: str, isAnonymous: bool, discordName: str
+    ) -> bool:
+        """Places a bet on the podium. Returns False, without placing it, if this Discord ID has already bet."""
+
+
+class GSheetStorage(StorageBackend):
+    """The Google Sheets document used during the tournament."""
+
+    async def add_registration(self, member: dict):
+        await gu.gspread_new_registration(member)
+
+    async def get_registration(self, discordId) -> Optional[rm.Registration]:
+        return await gu.get_registration(discordId)
+
+    async def list_registrations(self) -> list[rm.Registration]:
+        await gu.refresh_inscrits_mirror(full=True, priority=ss.Priority.BACKGROUND)
+        return list(gu.inscritsMirror.byDiscordId.values())
+
+    async def create_team(self, member1, member2, firstMode, secondMode, thirdMode):
+        return await gu.gspread_new_team(member1, member2, firstMode, secondMode, thirdMode)
+
+    async def get_qualified_teams_names(self) -> list[str]:
+        return await gu.get_qualified_teams_names()
+
+    async def has_bet(self, discordId: int) -> bool:
+        return await gu.has_bet(discordId)
+
+    async def place_bet(self, discordId, bet1, bet2, bet3, isAnonymous, discordName) -> bool:
+        return await gu.place_bet(discordId, bet1, bet2, bet3, isAnonymous, discordName)
+
+
+class MemoryStorage(StorageBackend):
+    """
+    Dictionaries in memory, to load-test the bot without Google.
+
+    Every operation waits `latency` seconds (plus up to `jitter` seconds) to mimic a remote storage.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, qualifiedTeams: Optional[list[str]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.registrations: dict[str, rm.Registration] = {}
+        self.teams: list[dict[str, str]] = []
+        self.qualifiedTeams = list(qualifiedTeams or [])
+        self.bets: dict[int, list] = {}
+
+    async def _wait(self):
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    async def add_registration(self, member: dict):
+        await self._wait()
+        self.registrations[str(member["discordId"])] = rm.Registration(
+            len(self.registrations) + 2, str(member["discordId"]), member["geoguessrId"], member["surname"]
+        )
+
+    async def get_registration(self, discordId) -> Optional[rm.Registration]:
+        await self._wait()
+        return self.registrations.get(str(discordId))
+
+    async def list_registrations(self) -> list[rm.Registration]:
+        await self._wait()
+        return list(self.registrations.values())
+
+    async def create_team(self, member1, member2, firstMode, secondMode, thirdMode):
+        await self._wait()
+        player1 = self.registrations.get(str(member1.id))
+        player2 = self.registrations.get(str(member2.id))
+        if player1 is None or player2 is None:
+            missing = member1 if player1 is None else member2
+            raise KeyError(f"{missing.name} ({missing.id}) n'est pas inscrit")
+        player1.hasTeam = player2.hasTeam = True
+        teamData = build_team_data(player1, player2, firstMode, secondMode, thirdMode)
+        self.teams.append(teamData)
+        return teamData
+
+    async def get_qualified_teams_names(self) -> list[str]:
+        await self._wait()
+        return list(self.qualifiedTeams)
+
+    async def has_bet(self, discordId: int) -> bool:
+        await self._wait()
+        return discordId in self.bets
+
+    async def place_bet(self, discordId, bet1, bet2, bet3, isAnonymous, discordName) -> bool:
+        await self._wait()
+        if discordId in self.bets:
+            return False
+        self.bets[discordId] = [bet1, bet2, bet3, isAnonymous, discordName]
+        return True
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    A local SQLite database, the source of truth of the tournament data.
+
+    The queries are small and indexed, so they are run directly on the event loop. The
+    `sheet_row` column holds the row of the record in its worksheet (NULL until exported) and
+    `dirty` flags registrations modified since their last export, see `sheet_sync.SheetSyncWorker`.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS registrations (
+            discord_id TEXT PRIMARY KEY,
+            geoguessr_id TEXT NOT NULL,
+            surname TEXT NOT NULL,
+            has_team INTEGER NOT NULL DEFAULT 0,
+            sheet_row INTEGER,
+            dirty INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE INDEX IF NOT EXISTS registrations_geoguessr_id ON registrations (geoguessr_id);
+        CREATE INDEX IF NOT EXISTS registrations_export ON registrations (dirty) WHERE dirty = 1;
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY,
+            team_name TEXT NOT NULL,
+            member1_discord_id TEXT NOT NULL,
+            member1_geoguessr_id TEXT NOT NULL,
+            member2_discord_id TEXT NOT NULL,
+            member2_geoguessr_id TEXT NOT NULL,
+            member1_surname TEXT NOT NULL,
+            member2_surname TEXT NOT NULL,
+            first_mode TEXT,
+            second_mode TEXT,
+            third_mode TEXT,
+            sheet_row INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS teams_team_name ON teams (team_name);
+        CREATE INDEX IF NOT EXISTS teams_member1 ON teams (member1_discord_id);
+        CREATE INDEX IF NOT EXISTS teams_member2 ON teams (member2_discord_id);
+        CREATE TABLE IF NOT EXISTS qualified_teams (
+            team_name TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS bets (
+            discord_id INTEGER PRIMARY KEY,
+            bet1 TEXT NOT NULL,
+            bet2 TEXT NOT NULL,
+            bet3 TEXT NOT NULL,
+            is_anonymous INTEGER NOT NULL,
+            discord_name TEXT NOT NULL,
+            sheet_row INTEGER
+        );
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        """
+        Args:
+            path (str, optional): Path of the database file, or ":memory:". Defaults to SQLITE_PATH.
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        self.connection.commit()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Opens another connection to the database file, usable from any thread (one thread at a time).
+
+        Used by `sheet_sync.SheetSyncWorker` to run its large queries with `asyncio.to_thread`: WAL lets the
+        bot keep reading while they run. Not available for an in-memory database.
+        """
+        if self.path == ":memory:":
+            raise ValueError("Une base SQLite en mémoire ne peut pas être ouverte une deuxième fois")
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _registration(self, discordId) -> Optional[rm.Registration]:
+        row = self.connection.execute(
+            "SELECT sheet_row, discord_id, geoguessr_id, surname, has_team FROM registrations WHERE discord_id = ?",
+            (str(discordId),),
+        ).fetchone()
+        return rm.Registration(row[0], row[1], row[2], row[3], bool(row[4])) if row else None
+
+    async def add_registration(self, member: dict):
+        with self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO registrations (discord_id, geoguessr_id, surname) VALUES (?, ?, ?)
+                ON CONFLICT (discord_id) DO UPDATE
+                SET geoguessr_id = excluded.geoguessr_id, surname = excluded.surname, dirty = 1
+                """,
+                (str(member["discordId"]), member["geoguessrId"], member["surname"]),
+            )
+
+    async def get_registration(self, discordId) -> Optional[rm.Registration]:
+        return self._registration(discordId)
+
+    async def get_registration_by_geoguessr_id(self, geoguessrId: str) -> Optional[rm.Registration]:
+        row = self.connection.execute(
+            "SELECT sheet_row, discord_id, geoguessr_id, surname, has_team FROM registrations WHERE geoguessr_id = ?",
+            (geoguessrId,),
+        ).fetchone()
+        return rm.Registration(row[0], row[1], row[2], row[3], bool(row[4])) if row else None
+
+    async def list_registrations(self) -> list[rm.Registration]:
+        rows = self.connection.execute(
+            "SELECT sheet_row, discord_id, geoguessr_id, surname, has_team FROM registrations ORDER BY sheet_row"
+        ).fetchall()
+        return [rm.Registration(row[0], row[1], row[2], row[3], bool(row[4])) for row in rows]
+
+    async def create_team(self, member1, member2, firstMode, secondMode, thirdMode):
+        player1 = self._registration(member1.id)
+        player2 = self._registration(member2.id)
+        if player1 is None or player2 is None:
+            missing = member1 if player1 is None else member2
+            raise KeyError(f"{missing.name} ({missing.id}) n'est pas inscrit")
+        teamData = build_team_data(player1, player2, firstMode, secondMode, thirdMode)
+        with self.connection:
+            self.connection.execute(
+                "UPDATE registrations SET has_team = 1, dirty = 1 WHERE discord_id IN (?, ?)",
+                (player1.discordId, player2.discordId),
+            )
+            self.connection.execute(
+                """
+                INSERT INTO teams (
+                    team_name, member1_discord_id, member1_geoguessr_id, member2_discord_id, member2_geoguessr_id,
+                    member1_surname, member2_surname, first_mode, second_mode, third_mode
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    teamData["team_name"],
+                    teamData["member1_discordId"],
+                    teamData["member1_geoguessrId"],
+                    teamData["member2_discordId"],
+                    teamData["member2_geoguessrId"],
+                    teamData["member1_surname"],
+                    teamData["member2_surname"],
+                    firstMode,
+                    secondMode,
+                    thirdMode,
+                ),
+            )
+        return teamData
+
+    async def get_qualified_teams_names(self) -> list[str]:
+        return [row[0] for row in self.connection.execute("SELECT team_name FROM qualified_teams")]
+
+    async def has_bet(self, discordId: int) -> bool:
+        return self.connection.execute("SELECT 1 FROM bets WHERE discord_id = ?", (discordId,)).fetchone() is not None
+
+    async def place_bet(self, discordId, bet1, bet2, bet3, isAnonymous, discordName) -> bool:
+        with self.connection:
+            cursor = self.connection.execute(
+                """
+                INSERT INTO bets (discord_id, bet1, bet2, bet3, is_anonymous, discord_name)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (discord_id) DO NOTHING
+                """,
+                (discordId, bet1, bet2, bet3, int(isAnonymous), discordName),
+            )
+        return cursor.rowcount == 1
+
+
+def create_storage(name: str) -> StorageBackend:
+    """
+    Creates the storage backend from its name: "gsheet", "sqlite" or "memory".
+
+    The "memory" backend reads its injected latency (in ms) from HELLBOT_STORAGE_LATENCY_MS.
+    """
+    if name == "gsheet":
+        return GSheetStorage()
+    if name == "sqlite":
+        return SQLiteStorage()
+    if name == "memory":
+        return MemoryStorage(latency=float(os.getenv("HELLBOT_STORAGE_LATENCY_MS", "0")) / 1000)
+    raise ValueError(f"Unknown storage backend: {name}")
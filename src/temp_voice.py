@@ -0,0 +1,78 @@
+import asyncio
+import traceback
+from typing import Optional
+
+import discord
+
+import config as cfg
+
+
+class TempVoiceManager:
+    """
+    Manages the temporary voice channels created when a member joins the "create" voice channel.
+
+    The IDs of the managed channels are kept in a set in memory, and written to the configuration
+    at most once every `persistDelay` seconds.
+    """
+
+    def __init__(self, config: cfg.BotConfig, persistDelay: float = 2.0):
+        """
+        Args:
+            config (BotConfig): The bot configuration, holding the "create" channel and the stored channel IDs.
+            persistDelay (float, optional): Seconds to wait before writing the changes. Defaults to 2.0.
+        """
+        self.config = config
+        self.persistDelay = persistDelay
+        self.channelIds: set[int] = set(config.tempVocalsChannelId)
+        self._persistTask: Optional[asyncio.Task] = None
+
+    def is_managed(self, channelId: int) -> bool:
+        return channelId in self.channelIds
+
+    def _schedule_persist(self):
+        if self._persistTask is None or self._persistTask.done():
+            self._persistTask = asyncio.create_task(self._persist_later())
+
+    async def _persist_later(self):
+        await asyncio.sleep(self.persistDelay)
+        self.flush()
+
+    def flush(self):
+        """Writes the managed channel IDs to the configuration if they changed."""
+        if set(self.config.tempVocalsChannelId) != self.channelIds:
+            self.config.update(tempVocalsChannelId=sorted(self.channelIds))
+
+    async def on_voice_state_update(
+        self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState
+    ):
+        """
+        Creates a channel for the member if they joined the "create" channel, and deletes the
+        managed channel they left if it is now empty.
+        """
+        if after.channel and after.channel.id == self.config.vocCreateChannelId:
+            createdVocal = await after.channel.category.create_voice_channel(f"{member.display_name}")
+            self.channelIds.add(createdVocal.id)
+            self._schedule_persist()
+            await member.move_to(createdVocal)
+        if before.channel and before.channel.id in self.channelIds and len(before.channel.members) == 0:
+            self.channelIds.discard(before.channel.id)
+            self._schedule_persist()
+            await before.channel.delete()
+
+    async def reconcile(self, guild: discord.Guild):
+        """
+        Compares the stored channel IDs with the guild, after a restart or a crash.
+
+        IDs of channels that no longer exist are dropped, and managed channels left empty are deleted.
+        """
+        for channelId in list(self.channelIds):
+            channel = guild.get_channel(channelId)
+            if channel is None:
+                self.channelIds.discard(channelId)
+            elif isinstance(channel, discord.VoiceChannel) and len(channel.members) == 0:
+                try:
+                    await channel.delete(reason="Salon vocal temporaire orphelin")
+                    self.channelIds.discard(channelId)
+                except discord.HTTPException:
+                    traceback.print_exc()
+        self.flush()
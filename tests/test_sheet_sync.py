@@ -0,0 +1,110 @@
+import asyncio
+import re
+
+import pytest
+
+import gspread_utilities as gu
+import sheet_sync as ssy
+import storage as st
+
+HEADERS = {
+    "Inscrits": ["ID Discord", "ID GeoGuessr", "Pseudo/surnom", "Équipe"],
+    "Teams": ["member1", "geo1", "member2", "geo2", "surname1", "surname2", "Nom d'équipe", "m1", "m2", "m3"],
+    "Bets": ["DiscordId", "Bet1", "Bet2", "Bet3", "Anonyme", "Nom"],
+    "Qualifiés": ["Nom d'équipe"],
+}
+
+
+class FakeWorksheet:
+    def __init__(self, name):
+        self.name = name
+        self.rows = []  # la ligne N de la feuille est self.rows[N - 2]
+
+    async def append_rows(self, rows):
+        firstRow = len(self.rows) + 2
+        self.rows.extend([list(row) for row in rows])
+        return {"updates": {"updatedRange": f"{self.name}!A{firstRow}:J{firstRow + len(rows) - 1}"}}
+
+    async def batch_update(self, updates):
+        for update in updates:
+            column, row = re.fullmatch(r"([A-Z])(\d+)", update["range"]).groups()
+            self.rows[int(row) - 2][ord(column) - ord("A")] = update["values"][0][0]
+
+
+@pytest.fixture
+def sheet(monkeypatch):
+    worksheets = {name: FakeWorksheet(name) for name in HEADERS}
+
+    async def run_on_worksheet(worksheetName, operation, kind="read", priority=None):
+        return await operation(worksheets[worksheetName])
+
+    async def get_columns(worksheetName, headers, firstRow=2, priority=None):
+        indexes = [header - 1 if isinstance(header, int) else HEADERS[worksheetName].index(header) for header in headers]
+        return [tuple(row[index] if index < len(row) else "" for index in indexes) for row in worksheets[worksheetName].rows]
+
+    async def get_column(worksheetName, header, firstRow=2, priority=None):
+        return [row[0] for row in await get_columns(worksheetName, [header])]
+
+    monkeypatch.setattr(gu, "run_on_worksheet", run_on_worksheet)
+    monkeypatch.setattr(gu, "get_columns", get_columns)
+    monkeypatch.setattr(gu, "get_column", get_column)
+    return worksheets
+
+
+@pytest.fixture
+def store(tmp_path):
+    return st.SQLiteStorage(str(tmp_path / "hellcup.sqlite3"))
+
+
+def register(store, discordId, geoguessrId, surname):
+    asyncio.run(store.add_registration({"discordId": discordId, "geoguessrId": geoguessrId, "surname": surname}))
+
+
+def test_export_appends_then_updates_changed_cells(sheet, store):
+    worker = ssy.SheetSyncWorker(store)
+    register(store, 1, "geo1", "Alice")
+    register(store, 2, "geo2", "Bob")
+    asyncio.run(store.place_bet(3, "a", "b", "c", True, "carol"))
+    asyncio.run(worker.export_once())
+    assert sheet["Inscrits"].rows == [["1", "geo1", "Alice", 0], ["2", "geo2", "Bob", 0]]
+    assert sheet["Bets"].rows == [["3", "a", "b", "c", True, "carol"]]
+
+    # Les organisateurs trient la feuille : la mise à jour retrouve la ligne par ID Discord
+    sheet["Inscrits"].rows.reverse()
+    register(store, 1, "geo1", "Alicia")
+    asyncio.run(worker.export_once())
+    assert sheet["Inscrits"].rows == [["2", "geo2", "Bob", 0], ["1", "geo1", "Alicia", 0]]
+    assert asyncio.run(store.get_registration(1)).row == 3
+
+    asyncio.run(worker.export_once())
+    assert len(sheet["Inscrits"].rows) == 2
+    assert len(sheet["Bets"].rows) == 1
+
+
+def test_import_reads_organizer_edits(sheet, store):
+    worker = ssy.SheetSyncWorker(store)
+    sheet["Inscrits"].rows = [["1", "geo1", "Alice", "1"], ["", "", "", ""], ["2", "geo2", "Bob", ""]]
+    sheet["Qualifiés"].rows = [["Alice_Bob"], [""]]
+    sheet["Bets"].rows = [["42", "", "", "", "", ""], ["not an id", "", "", "", "", ""], [" ", "", "", "", "", ""]]
+    asyncio.run(worker.import_once())
+
+    alice = asyncio.run(store.get_registration(1))
+    assert (alice.surname, alice.hasTeam, alice.row) == ("Alice", True, 2)
+    assert asyncio.run(store.get_registration(2)).row == 4
+    assert asyncio.run(store.get_qualified_teams_names()) == ["Alice_Bob"]
+    assert asyncio.run(store.has_bet(42))
+    assert worker.lastImport is not None
+
+    # Pari supprimé de la feuille par les organisateurs
+    sheet["Bets"].rows = []
+    asyncio.run(worker.import_once())
+    assert not asyncio.run(store.has_bet(42))
+
+
+def test_import_keeps_changes_not_exported_yet(sheet, store):
+    worker = ssy.SheetSyncWorker(store)
+    sheet["Inscrits"].rows = [["1", "geo1", "Alice", ""]]
+    asyncio.run(worker.import_once())
+    register(store, 1, "geo1", "Alicia")
+    asyncio.run(worker.import_once())
+    assert asyncio.run(store.get_registration(1)).surname == "Alicia"
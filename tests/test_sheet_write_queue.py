@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import sheet_write_queue as swq
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.rows = []
+        self.updates = []
+
+    def append_rows(self, rows):
+        firstRow = len(self.rows) + 2
+        self.rows.extend(rows)
+        return {"updates": {"updatedRange": f"Inscrits!A{firstRow}:D{firstRow + len(rows) - 1}"}}
+
+    def batch_update(self, updates):
+        self.updates.extend(updates)
+
+
+class FakeSheet:
+    def __init__(self, delay: float = 0):
+        self.worksheet = FakeWorksheet()
+        self.delay = delay
+        self.calls = 0
+
+    async def run_on_worksheet(self, worksheetName, operation):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return operation(self.worksheet)
+
+
+def read_journal(path):
+    with open(path, encoding="utf-8") as journal:
+        return [json.loads(line) for line in journal]
+
+
+def test_write_enqueued_during_flush_is_sent(tmp_path):
+    async def scenario():
+        sheet = FakeSheet(delay=0.05)
+        queue = swq.SheetWriteQueue(sheet.run_on_worksheet, str(tmp_path / "journal.jsonl"), flushDelay=0.01)
+        first = queue.append("Inscrits", ["a"])
+        await asyncio.sleep(0.03)  # le premier envoi est en cours
+        second = queue.append("Inscrits", ["b"])
+        return await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+
+    assert asyncio.run(scenario()) == [2, 3]
+
+
+def test_max_batch_size_flushes_immediately(tmp_path):
+    async def scenario():
+        sheet = FakeSheet()
+        queue = swq.SheetWriteQueue(sheet.run_on_worksheet, str(tmp_path / "journal.jsonl"), flushDelay=60, maxBatchSize=2)
+        futures = [queue.append("Inscrits", [str(i)]) for i in range(2)]
+        await asyncio.wait_for(asyncio.gather(*futures), timeout=1)
+        return sheet.calls
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_journal_is_compacted_after_flush(tmp_path):
+    journalPath = tmp_path / "journal.jsonl"
+
+    async def scenario():
+        sheet = FakeSheet()
+        queue = swq.SheetWriteQueue(sheet.run_on_worksheet, str(journalPath), flushDelay=60)
+        queue.append("Inscrits", ["a"])
+        queue.update("Inscrits", [{"range": "B2", "values": [["x"]]}])
+        await queue.flush()
+
+    asyncio.run(scenario())
+    assert not journalPath.exists() or read_journal(journalPath) == []
+
+
+def test_uncommitted_writes_are_replayed(tmp_path):
+    journalPath = tmp_path / "journal.jsonl"
+    entries = [
+        {"id": "1", "op": "append", "worksheet": "Inscrits", "data": ["a"]},
+        {"id": "2", "op": "append", "worksheet": "Inscrits", "data": ["b"]},
+        {"id": "1", "done": True},
+    ]
+    journalPath.write_text("".join(json.dumps(entry) + "\n" for entry in entries) + '{"id": "3", "op"', encoding="utf-8")
+
+    sheet = FakeSheet()
+    queue = swq.SheetWriteQueue(sheet.run_on_worksheet, str(journalPath), flushDelay=60)
+    assert [pendingWrite.writeId for pendingWrite in queue.pending] == ["2"]
+    assert [entry["id"] for entry in read_journal(journalPath)] == ["2"]
+
+    asyncio.run(queue.flush())
+    assert sheet.worksheet.rows == [["b"]]
+    assert not journalPath.exists() or read_journal(journalPath) == []
+
+
+def test_failed_replayed_write_stays_in_journal(tmp_path):
+    journalPath = tmp_path / "journal.jsonl"
+    journalPath.write_text(json.dumps({"id": "1", "op": "append", "worksheet": "Inscrits", "data": ["a"]}) + "\n")
+    failures = []
+
+    async def failing(worksheetName, operation):
+        raise RuntimeError("quota")
+
+    async def on_failure(worksheetName, count, error):
+        failures.append((worksheetName, count))
+
+    queue = swq.SheetWriteQueue(failing, str(journalPath), flushDelay=60, onFailure=on_failure)
+    asyncio.run(queue.flush())
+    assert failures == [("Inscrits", 1)]
+    assert [entry["id"] for entry in read_journal(journalPath)] == ["1"]
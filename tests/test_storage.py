@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import storage as st
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request):
+    if request.param == "memory":
+        return st.MemoryStorage(qualifiedTeams=["Alice_Bob"])
+    store = st.SQLiteStorage(":memory:")
+    with store.connection:
+        store.connection.execute("INSERT INTO qualified_teams (team_name) VALUES ('Alice_Bob')")
+    return store
+
+
+def register(store, discordId, geoguessrId, surname):
+    asyncio.run(store.add_registration({"discordId": discordId, "geoguessrId": geoguessrId, "surname": surname}))
+
+
+def test_registration_lookup(store):
+    register(store, 1, "geo1", "Alice")
+    registration = asyncio.run(store.get_registration(1))
+    assert (registration.discordId, registration.geoguessrId, registration.surname) == ("1", "geo1", "Alice")
+    assert asyncio.run(store.get_registration(2)) is None
+    assert [r.discordId for r in asyncio.run(store.list_registrations())] == ["1"]
+
+
+def test_create_team(store):
+    register(store, 1, "geo1", "Alice")
+    register(store, 2, "geo2", "Bob")
+    teamData = asyncio.run(
+        store.create_team(SimpleNamespace(id=1, name="alice"), SimpleNamespace(id=2, name="bob"), "Move", "NM", "NMPZ")
+    )
+    assert teamData["team_name"] == "Alice_Bob"
+    assert asyncio.run(store.get_registration(1)).hasTeam
+
+
+def test_create_team_with_unregistered_member(store):
+    register(store, 1, "geo1", "Alice")
+    with pytest.raises(KeyError):
+        asyncio.run(
+            store.create_team(SimpleNamespace(id=1, name="alice"), SimpleNamespace(id=3, name="carol"), "", "", "")
+        )
+
+
+def test_bets(store):
+    assert asyncio.run(store.get_qualified_teams_names()) == ["Alice_Bob"]
+    assert not asyncio.run(store.has_bet(42))
+    assert asyncio.run(store.place_bet(42, "Alice_Bob", "b", "c", False, "carol"))
+    assert asyncio.run(store.has_bet(42))
+
+
+def test_duplicate_bet_is_refused(store):
+    assert asyncio.run(store.place_bet(42, "a", "b", "c", False, "carol"))
+    assert not asyncio.run(store.place_bet(42, "c", "b", "a", True, "carol"))
+    if isinstance(store, st.SQLiteStorage):
+        bets = store.connection.execute("SELECT bet1, is_anonymous FROM bets").fetchall()
+    else:
+        bets = [(bet[0], int(bet[3])) for bet in store.bets.values()]
+    assert bets == [("a", 0)]
+
+
+def test_concurrent_bets_place_only_one(store):
+    async def both():
+        return await asyncio.gather(*(store.place_bet(42, "a", "b", "c", False, "carol") for _ in range(2)))
+
+    assert sorted(asyncio.run(both())) == [False, True]
+
+
+def test_memory_storage_latency():
+    store = st.MemoryStorage(latency=0.02)
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await store.has_bet(1)
+        return loop.time() - start
+
+    assert asyncio.run(timed()) >= 0.02